@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Rows per second decoded by ParseObject.convert_from_parse_to_native on a generated fixture,
+compared with the exception driven attribute decoding it replaced, and with a class that
+declares its schema.
+
+    python benchmarks/decode.py [rows]
+"""
+import datetime
+import sys
+import time
+from pyparsecom.objects import ParseObject, ComplexTypeMeta
+from pyparsecom.types import Date
+from pyparsecom.exceptions import ParseClassDoesNotExist
+
+
+def legacy_from_str(date_str):
+    return datetime.datetime.strptime(date_str[:-1] + 'UTC', Date.FORMAT)
+
+
+class BenchRow(ParseObject):
+    pass
+
+
+class SchemaBenchRow(ParseObject):
+    schema = {
+        'name': 'String',
+        'description': 'String',
+        'count': 'Number',
+        'score': 'Number',
+        'active': 'Boolean',
+        'tags': 'Array',
+        'location': 'GeoPoint',
+        'owner': 'Pointer'
+    }
+
+
+class LegacyBenchRow(ParseObject):
+    @staticmethod
+    def convert_from_parse_to_native(response, className=None, item=None, is_loaded=True):
+        # hydration as it was before pyparsecom.codec
+        item = LegacyBenchRow()
+
+        for k, v in response.items():
+            setattr(item, k, item.convert_attribute_from_parse_to_native(k, v))
+
+            if k in item._dirty_keys:
+                item._dirty_keys.remove(k)
+
+        item._is_loaded = is_loaded
+
+        return item
+
+    def convert_attribute_from_parse_to_native(self, key, data):
+        try:
+            data = legacy_from_str(data)
+        except Exception:
+            pass
+        else:
+            return data
+
+        if not isinstance(data, dict):
+            return data
+
+        if '__type' in data:
+            data = dict(data)
+            parse_type = str(data.pop('__type'))
+        else:
+            return data
+
+        cls = ComplexTypeMeta.register.get(parse_type, None)
+
+        if cls is None:
+            raise ParseClassDoesNotExist('%s does not exist' % parse_type)
+
+        item = type(parse_type, (cls,), {})(**data)
+        item.add_parent(parent=self, attribute=key)
+
+        return item
+
+
+def fixture(n):
+    return [{
+        'objectId': 'obj%07d' % i,
+        'createdAt': '2015-09-01T12:%02d:%02d.%03dZ' % (i // 60 % 60, i % 60, i % 1000),
+        'updatedAt': '2015-09-02T08:%02d:%02d.%03dZ' % (i // 60 % 60, i % 60, i % 1000),
+        'name': 'Row %d' % i,
+        'description': 'A row used to benchmark decoding',
+        'count': i,
+        'score': i / 7.0,
+        'active': i % 2 == 0,
+        'tags': ['a', 'b', 'c'],
+        'location': {'__type': 'GeoPoint', 'latitude': 40.0, 'longitude': -74.0},
+        'owner': {'__type': 'Pointer', 'className': '_User', 'objectId': 'user%d' % (i % 50)}
+    } for i in range(n)]
+
+
+def measure(rows, cls):
+    start = time.time()
+    for row in rows:
+        cls.convert_from_parse_to_native(row, className=cls.__name__)
+    return len(rows) / (time.time() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = fixture(n)
+
+    before = measure(rows, LegacyBenchRow)
+    after = measure(rows, BenchRow)
+    schema = measure(rows, SchemaBenchRow)
+
+    print('%d rows' % n)
+    print('before: %10.0f rows/s' % before)
+    print('after:  %10.0f rows/s (%.2fx)' % (after, after / before))
+    print('schema: %10.0f rows/s (%.2fx)' % (schema, schema / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bytes per hydrated object for a regular ParseObject subclass compared with a
+CompactParseObject subclass holding the same rows, measured with tracemalloc.
+
+    python benchmarks/memory.py [rows]
+"""
+import gc
+import sys
+import tracemalloc
+from pyparsecom.objects import ParseObject
+from pyparsecom.compact import CompactParseObject
+
+
+class MemoryRow(ParseObject):
+    pass
+
+
+class CompactMemoryRow(CompactParseObject):
+    pass
+
+
+def fixture(n):
+    return [{
+        'objectId': 'obj%07d' % i,
+        'createdAt': '2015-09-01T12:%02d:%02d.%03dZ' % (i // 60 % 60, i % 60, i % 1000),
+        'updatedAt': '2015-09-02T08:%02d:%02d.%03dZ' % (i // 60 % 60, i % 60, i % 1000),
+        'name': 'Row %d' % i,
+        'count': i,
+        'score': i / 7.0,
+        'active': i % 2 == 0,
+        'location': {'__type': 'GeoPoint', 'latitude': 40.0, 'longitude': -74.0}
+    } for i in range(n)]
+
+
+def measure(rows, cls):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+
+    items = [cls.hydrate(row) for row in rows]
+    # touch the layout so that the compact class is measured in its steady state
+    items[0].name
+
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    return float(used) / len(items)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = fixture(n)
+
+    regular = measure(rows, MemoryRow)
+    compact = measure(rows, CompactMemoryRow)
+
+    print('%d rows' % n)
+    print('ParseObject:        %8.0f bytes/object' % regular)
+    print('CompactParseObject: %8.0f bytes/object (%.2fx smaller)' % (compact, regular / compact))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,511 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+asyncio client, requires python 3.6 or later. The classes mirror ParseObject, Query and User and
+share their object model, encoding and decoding, only the requests are awaited instead of
+blocking:
+
+    class City(AsyncParseObject):
+        pass
+
+    city = City(name='Paris')
+    await city.save()
+
+    async for city in AsyncQuery('City').iterate():
+        ...
+
+Requests go through the async_transport of the Parse instance, an AiohttpTransport if aiohttp
+is installed and none was set, otherwise the blocking transport run in the default executor.
+Either way a ThrottledTransport set as the blocking transport also throttles asyncio requests.
+"""
+
+import asyncio
+import json
+import logging
+from .core import Parse
+from .throttle import ThrottledTransport, is_throttled, retry_after
+from .transport import LocalResponse
+from .cache import Cache
+from .objects import ParseObject, ComplexTypeMeta, Batch
+from .query import Query
+from .user import User
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncTransport(object):
+    """
+    Base class of the transports of the asyncio client, send is a coroutine returning a response
+    exposing ``status_code``, ``headers`` and ``json()`` like Transport.send.
+    """
+
+    async def send(self, method, url, data=None, headers=None):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class BufferedResponse(object):
+    """
+    Response whose body was read completely.
+    """
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AiohttpTransport(AsyncTransport):
+    """
+    Transport backed by an aiohttp ClientSession, connections are kept alive and pooled. The
+    session is created on first use, in the running event loop.
+    """
+
+    def __init__(self, pool_maxsize=100, connect_timeout=10, read_timeout=30):
+        """
+        :param pool_maxsize: maximum number of simultaneous connections
+        :param connect_timeout: seconds to wait for a connection to the server
+        :param read_timeout: seconds to wait for the server to send a response
+        """
+        if aiohttp is None:
+            raise ImportError('AiohttpTransport requires aiohttp')
+
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session = None
+
+    async def send(self, method, url, data=None, headers=None):
+        if self.session is None:
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout,
+                                            sock_read=self.read_timeout)
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+        async with self.session.request(method, url, data=data, headers=headers) as response:
+            content = await response.text()
+            return BufferedResponse(response.status, content, response.headers)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class ExecutorTransport(AsyncTransport):
+    """
+    Runs a blocking Transport in the default executor of the event loop.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def send(self, method, url, data=None, headers=None):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.transport.send(method, url, data=data, headers=headers))
+
+
+class AsyncLocalTransport(AsyncTransport):
+    """
+    Asyncio counterpart of LocalTransport, hands requests to a python callable.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def send(self, method, url, data=None, headers=None):
+        return LocalResponse(*self.handler(method.upper(), url, data, headers or {}))
+
+
+class AsyncThrottledTransport(AsyncTransport):
+    """
+    Asyncio counterpart of ThrottledTransport, rate limits the requests of an async transport
+    with a TokenBucket and bounds them with an AdaptiveLimiter. The bucket and the limiter can be
+    those of a ThrottledTransport, blocking and asyncio requests then share the quota. Waiting
+    for tokens or for a slot suspends the task instead of blocking the event loop.
+    """
+
+    def __init__(self, transport, bucket=None, limiter=None, poll_interval=0.01):
+        """
+        :param transport: AsyncTransport sending the requests
+        :param bucket: TokenBucket every request takes a token from
+        :param limiter: AdaptiveLimiter bounding the requests in flight
+        :param poll_interval: seconds between checks for a free slot of the limiter
+        """
+        self.transport = transport
+        self.bucket = bucket
+        self.limiter = limiter
+        self.poll_interval = poll_interval
+
+    async def send(self, method, url, data=None, headers=None):
+        ticket = await self._acquire_slot() if self.limiter is not None else None
+        throttled = None
+
+        try:
+            if self.bucket is not None:
+                delay = self.bucket._take(1)
+
+                while delay > 0:
+                    await asyncio.sleep(delay)
+                    delay = self.bucket._take(1)
+
+            response = await self.transport.send(method, url, data=data, headers=headers)
+            throttled = is_throttled(response)
+
+            if throttled and self.bucket is not None:
+                self.bucket.drain(retry_after(response))
+
+            return response
+        finally:
+            if self.limiter is not None:
+                self.limiter.release(ticket, throttled)
+
+    async def _acquire_slot(self):
+        # the limiter is shared with threads, so its slots are polled rather than awaited
+        ticket = self.limiter.try_acquire()
+
+        while ticket is None:
+            await asyncio.sleep(self.poll_interval)
+            ticket = self.limiter.try_acquire()
+
+        return ticket
+
+    async def close(self):
+        await self.transport.close()
+
+
+def get_transport(parse):
+    """
+    Async transport of a Parse instance, created on first use if it has none. When the blocking
+    transport is a ThrottledTransport, the async transport is throttled with the same bucket and
+    limiter.
+    """
+    if parse.async_transport is None:
+        if aiohttp is not None:
+            parse.async_transport = AiohttpTransport()
+
+            if isinstance(parse.transport, ThrottledTransport):
+                parse.async_transport = AsyncThrottledTransport(
+                    parse.async_transport, parse.transport.bucket, parse.transport.limiter)
+        else:
+            # the blocking transport applies its own throttling
+            parse.async_transport = ExecutorTransport(parse.transport)
+
+    return parse.async_transport
+
+
+async def request(client=None, **options):
+    """
+    Awaitable counterpart of Parse.request.
+    :param client: Parse instance sending the request, defaults to Parse.current()
+    """
+    parse = client if client is not None else Parse.current()
+    url, data, method, headers = parse._prepare(**options)
+    transport = get_transport(parse)
+    policy = parse.retry_policy
+    attempt = 1
+
+    while True:
+        try:
+            response = await transport.send(method, url, data=data, headers=headers)
+        except Exception as e:
+            logging.getLogger(__name__).debug(e)
+            delay = policy.delay(method, attempt, error=e)
+
+            if delay is None:
+                raise
+        else:
+            delay = policy.delay(method, attempt, response=response)
+
+            if delay is None:
+                return Parse._handle(response)
+
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def batch(requests, client=None):
+    """
+    Awaitable counterpart of Parse.batch.
+    """
+    parse = client if client is not None else Parse.current()
+    results = []
+
+    for chunk in parse._batch_chunks(requests):
+        try:
+            response = await request(parse, route='batch', method='POST', data={'requests': chunk})
+        except Exception as e:
+            logging.getLogger(__name__).debug(e)
+            results.extend([Parse._chunk_error(e)] * len(chunk))
+        else:
+            results.extend(Parse._batch_results(response))
+
+    return results
+
+
+class AsyncParseObject(ParseObject):
+    """
+    ParseObject whose requests are awaited, subclass it instead of ParseObject. Subclasses are
+    registered apart from blocking ones, a parse class can be modeled by both.
+    """
+    _asynchronous = True
+
+    async def save(self):
+        dirty_keys = list(self._dirty_keys)
+        response = await request(self._get_client(), **self._save_options())
+        self._apply_save(response, dirty_keys)
+
+    async def delete(self):
+        await request(self._get_client(), **self._delete_options())
+        self._apply_delete()
+
+    async def fetch(self):
+        if self._is_kept():
+            return
+
+        response = await request(self._get_client(), **self._fetch_options())
+        self._apply_fetch(response)
+
+    @staticmethod
+    async def save_all(objects):
+        """
+        Awaitable counterpart of ParseObject.save_all.
+        """
+        batch = Batch()
+        for item in objects:
+            batch.save(item)
+        return await commit(batch)
+
+    @staticmethod
+    async def delete_all(objects):
+        """
+        Awaitable counterpart of ParseObject.delete_all.
+        """
+        batch = Batch()
+        for item in objects:
+            batch.delete(item)
+        return await commit(batch)
+
+
+async def commit(pending):
+    """
+    Awaitable counterpart of Batch.commit.
+    """
+    operations, pending.operations = pending.operations, []
+    results = [None] * len(operations)
+
+    for client, positions in Batch._clients(operations).items():
+        responses = await batch([operations[i][1] for i in positions], client)
+
+        for i, response in zip(positions, responses):
+            results[i] = response
+
+    return Batch._apply(operations, results)
+
+
+class AsyncQuery(Query):
+    """
+    Query whose requests are awaited. Queries derived from it with the builder methods are
+    AsyncQueries too. Results are objects of the AsyncParseObject subclass of their class if
+    there is one.
+    """
+    _asynchronous = True
+
+    async def fetch(self):
+        return self._query_set(await self._find(self.build()))
+
+    async def fetch_with_count(self):
+        response = await self._find(self._set('count', 1).build())
+        query_set = self._query_set(response)
+        query_set.count = response['count']
+
+        return query_set
+
+    async def count(self):
+        return (await self._find(self._count_query().build()))['count']
+
+    async def get(self, objectId):
+        item = self._kept(objectId)
+
+        if item is not None:
+            return item
+
+        options = self._get_options(objectId)
+        response = await self._request((self.className, objectId, options.get('params', None)),
+                                       options)
+
+        cls = ComplexTypeMeta.get_class(self.className, self._asynchronous)
+        return self._bound(cls.hydrate(response, is_loaded=True))
+
+    async def _find(self, params, cached=True):
+        options = {
+            'route': 'classes',
+            'className': self.className,
+            'method': 'GET',
+            'params': params
+        }
+
+        if not cached:
+            return await request(self._get_client(), **options)
+
+        return await self._request(Cache.key(self.className, params), options)
+
+    async def _request(self, key, options):
+        parse = self._get_client()
+        cache = parse.cache
+
+        if cache is None:
+            return await request(parse, **options)
+
+        key = key + parse._effective_credentials(**options)
+        response = cache.lookup(key)
+
+        if response is None:
+            response = await request(parse, **options)
+            cache.store(key, response, [self.className], include='include' in self.params)
+
+        return response
+
+    async def iterate(self, page_size=100, cursor='objectId', prefetch=0):
+        """
+        Asynchronous generator over every object matching the query, see Query.iterate.
+        """
+        pages = self._pages(page_size, cursor)
+
+        if prefetch > 0:
+            pages = AsyncQuery._prefetch(pages, prefetch)
+
+        async for page in pages:
+            for item in page:
+                yield item
+
+    async def iterate_columns(self, fields, page_size=1000, cursor='objectId', prefetch=0):
+        """
+        Asynchronous generator of the columns of each page, see Query.iterate_columns.
+        """
+        query = self if 'keys' in self.params else self.keys(list(fields))
+        pages = query._pages(page_size, cursor)
+
+        if prefetch > 0:
+            pages = AsyncQuery._prefetch(pages, prefetch)
+
+        async for page in pages:
+            yield page.to_columns(fields)
+
+    @staticmethod
+    async def _prefetch(pages, depth):
+        """
+        Requests pages ahead in a task, at most depth pages wait in the buffer.
+        """
+        buffer = asyncio.Queue(maxsize=depth)
+
+        async def produce():
+            try:
+                async for page in pages:
+                    await buffer.put((page, None))
+            except Exception as e:
+                await buffer.put((None, e))
+            else:
+                await buffer.put((None, None))
+
+        task = asyncio.ensure_future(produce())
+
+        try:
+            while True:
+                page, error = await buffer.get()
+
+                if error is not None:
+                    raise error
+
+                if page is None:
+                    return
+
+                yield page
+        finally:
+            task.cancel()
+
+    async def _pages(self, page_size, cursor):
+        self._check_cursor(cursor)
+
+        remaining = self.params.get('limit', None)
+        last = None
+
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = await self._page_query(size, cursor, last).fetch()
+
+            if len(page) > 0:
+                yield page
+
+            if len(page) < size or self._pins_cursor(cursor):
+                return
+
+            last = page.results[-1]
+
+            if remaining is not None:
+                remaining -= len(page)
+
+
+class AsyncUser(User):
+    """
+    User whose requests are awaited.
+    """
+    _asynchronous = True
+
+    @staticmethod
+    async def become(session_token, client=None):
+        response = await request(client, **User._become_options(session_token))
+        return AsyncUser._from_response(response, client)
+
+    @staticmethod
+    async def login(username, password, client=None):
+        response = await request(client, **User._login_options(username, password))
+        return AsyncUser._from_response(response, client)
+
+    @staticmethod
+    async def signup(username, password, client=None):
+        response = await request(client, **User._signup_options(username, password))
+        return AsyncUser._from_response(response, client)
+
+    @staticmethod
+    def _from_response(response, client):
+        user = AsyncUser().bind(client)
+        ParseObject.convert_from_parse_to_native(response, item=user, is_loaded=True)
+        return user
+
+    async def save(self):
+        dirty_keys = list(self._dirty_keys)
+        response = await request(self._get_client(), **self._save_options())
+        self._apply_save(response, dirty_keys)
+
+    async def delete(self):
+        await request(self._get_client(), **self._delete_options())
+        self._apply_delete()
@@ -0,0 +1,208 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from six.moves.urllib.parse import parse_qsl, urlencode
+
+
+class Cache(object):
+    """
+    Read-through cache of query responses, set as the cache of a Parse instance to be used by
+    Query.get and Query.fetch:
+
+        Parse.initialize(application_id, rest_api_key, cache=LRUCache(ttls={'Config': 300}))
+
+    Entries are looked up by the key of the request and tagged with the classes their response
+    holds, so that a save or delete in one of those classes invalidates them. Subclasses decide
+    where and for how long responses are kept.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # guards the counters, lookups happen from many threads at once
+        self.counters_lock = threading.Lock()
+
+    @staticmethod
+    def key(className, params):
+        """
+        Key of a find request, its url parameters in a canonical order so that equal queries built
+        in a different order share the entry.
+        """
+        pairs = []
+
+        for k, v in sorted(parse_qsl(params or '')):
+            if k == 'where':
+                v = json.dumps(json.loads(v), sort_keys=True)
+            pairs.append((k, v))
+
+        return className, urlencode(pairs)
+
+    def get(self, key):
+        """
+        :return: the cached response for key, None if there is none
+        """
+        raise NotImplementedError
+
+    def set(self, key, response, classes):
+        """
+        Cache response under key.
+        :param classes: names of the classes the response holds objects of
+        """
+        raise NotImplementedError
+
+    def invalidate(self, className=None):
+        """
+        Drop the entries holding objects of className, every entry if className is None.
+        """
+        raise NotImplementedError
+
+    def fetch(self, key, classes, request, include=False):
+        """
+        Cached response for key, or the response of request which is then cached.
+        :param classes: names of the classes the response holds objects of
+        :param request: callable sending the request
+        :param include: whether the response may embed objects of other classes
+        """
+        response = self.lookup(key)
+
+        if response is None:
+            response = request()
+            self.store(key, response, classes, include)
+
+        return response
+
+    def lookup(self, key):
+        """
+        Cached response for key counted as a hit, or None counted as a miss.
+        """
+        response = self.get(key)
+
+        with self.counters_lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return response
+
+    def store(self, key, response, classes, include=False):
+        """
+        Cache response, tagged with classes and with the classes of the objects it embeds if the
+        request used include.
+        """
+        classes = set(classes)
+
+        if include:
+            classes.update(embedded_classes(response))
+
+        self.set(key, response, classes)
+
+
+def embedded_classes(response):
+    """
+    Names of the classes of the objects embedded in a response by include.
+    """
+    classes = set()
+    pending = [response]
+
+    while pending:
+        value = pending.pop()
+
+        if isinstance(value, dict):
+            if value.get('__type', None) == 'Object':
+                classes.add(value['className'])
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+
+    return classes
+
+
+class LRUCache(Cache):
+    """
+    Cache kept in memory, holding at most max_size responses and dropping the least recently used
+    one beyond that. Responses expire after the ttl of their class. Responses are stored
+    serialized so that changes to the objects built from them do not reach the cache.
+    """
+
+    def __init__(self, max_size=1000, ttl=60, ttls=None, clock=time.time):
+        """
+        :param max_size: maximum number of cached responses
+        :param ttl: seconds a response is cached for
+        :param ttls: dict of class name to seconds overriding ttl for that class, 0 disables
+                     caching of the class
+        :param clock: function returning the current time in seconds
+        """
+        super(LRUCache, self).__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+
+            if entry is None:
+                return None
+
+            expires, classes, data = entry
+
+            if expires <= self.clock():
+                return None
+
+            # most recently used entries are kept at the end
+            self.entries[key] = entry
+
+        return json.loads(data)
+
+    def set(self, key, response, classes):
+        ttl = min(self.ttls.get(className, self.ttl) for className in classes)
+
+        if ttl <= 0:
+            return
+
+        data = json.dumps(response)
+
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (self.clock() + ttl, classes, data)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, className=None):
+        with self.lock:
+            if className is None:
+                self.entries.clear()
+                return
+
+            for key in [k for k, entry in self.entries.items() if className in entry[1]]:
+                del self.entries[key]
@@ -0,0 +1,215 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import datetime
+import six
+import threading
+from .objects import BaseParseObject, ParseObject, ParseType, ComplexTypeMeta
+from .types import Date, Binary, GeoPoint, Pointer
+
+# attributes parse always sends as plain ISO 8601 strings
+DATE_ATTRIBUTES = frozenset(['createdAt', 'updatedAt'])
+
+
+def decode(parent, key, value):
+    """
+    Converts the value of the attribute key of parent from parse to python. The conversion is
+    chosen from the type of the value and its __type tag, strings are only parsed as dates for
+    the attributes parse sends dates in.
+    :param parent: ParseObject the value belongs to
+    :param key: attribute name
+    :param value: attribute data
+    :return:
+    """
+    if isinstance(value, dict):
+        return decode_dict(parent, key, value)
+
+    if key in DATE_ATTRIBUTES and isinstance(value, six.string_types):
+        return Date.from_str(value)
+
+    return value
+
+
+def decode_dict(parent, key, value):
+    if '__type' in value:
+        parse_type = value['__type']
+    elif key == 'ACL':
+        parse_type = 'ACL'
+    else:
+        return value
+
+    decoder = DECODERS.get(parse_type, None)
+
+    if decoder is not None:
+        return decoder(parent, key, value)
+
+    # get the python class for the type
+    cls = ComplexTypeMeta.get_class(parse_type)
+
+    data = dict(value)
+    data.pop('__type', None)
+
+    return attach(parent, key, cls(**data))
+
+
+def attach(parent, key, item):
+    # add parent to the object so that when this object is updated, the parent is marked as dirty
+    item.add_parent(parent=parent, attribute=key)
+    return item
+
+
+def decode_date(parent, key, value):
+    return attach(parent, key, Date(Date.from_str(value['iso'])))
+
+
+def decode_bytes(parent, key, value):
+    return attach(parent, key, Binary(value['base64']))
+
+
+def decode_object(parent, key, value):
+    # objects embedded by include are complete objects rather than pointers, of the asyncio
+    # client when the object holding them is
+    data = dict(value)
+    del data['__type']
+
+    return ParseObject.convert_from_parse_to_native(
+        data, className=data.pop('className'), is_loaded=True,
+        asynchronous=getattr(parent, '_asynchronous', False))
+
+
+DECODERS = {
+    'Date': decode_date,
+    'Bytes': decode_bytes,
+    'Object': decode_object
+}
+
+
+def decode_date_str(parent, key, value):
+    return Date.from_str(value) if isinstance(value, six.string_types) else value
+
+
+def decode_geo_point(parent, key, value):
+    return attach(parent, key, GeoPoint(latitude=value['latitude'], longitude=value['longitude']))
+
+
+def decode_pointer(parent, key, value):
+    if value['__type'] == 'Object':
+        return decode_object(parent, key, value)
+
+    return attach(parent, key, Pointer(className=value['className'], objectId=value['objectId']))
+
+
+def keep(parent, key, value):
+    return value
+
+
+def nullable(decoder):
+    def decode_or_none(parent, key, value):
+        return None if value is None else decoder(parent, key, value)
+    return decode_or_none
+
+
+def encode(value):
+    """
+    Converts a python value of an attribute to parse.
+    """
+    if isinstance(value, BaseParseObject):
+        return value.to_pointer().convert_from_native_to_parse()
+    elif isinstance(value, ParseType):
+        return value.convert_from_native_to_parse()
+
+    return value
+
+
+def encode_date(value):
+    if isinstance(value, datetime.datetime):
+        value = Date(value)
+    return encode(value)
+
+
+def identity(value):
+    return value
+
+
+# decoders and encoders for the types of the parse schema, other types use decode and encode
+SCHEMA_DECODERS = {
+    'String': keep,
+    'Number': keep,
+    'Boolean': keep,
+    'Array': keep,
+    'Object': keep,
+    'Date': nullable(decode_date),
+    'GeoPoint': nullable(decode_geo_point),
+    'Pointer': nullable(decode_pointer),
+    'Bytes': nullable(decode_bytes)
+}
+
+SCHEMA_ENCODERS = {
+    'String': identity,
+    'Number': identity,
+    'Boolean': identity,
+    'Date': encode_date
+}
+
+
+class ClassCodec(object):
+    """
+    Decoders and encoders of the attributes of a ParseObject class, compiled once from the schema
+    of the class. Attributes that are not in the schema use the generic decode and encode.
+    """
+
+    def __init__(self, schema=None):
+        self.schema = schema
+
+        # parse sends these as plain strings whatever the schema says
+        self.decoders = {
+            'objectId': keep,
+            'createdAt': decode_date_str,
+            'updatedAt': decode_date_str
+        }
+        self.encoders = {}
+
+        for key, parse_type in (schema or {}).items():
+            if key in self.decoders:
+                continue
+
+            if parse_type in SCHEMA_DECODERS:
+                self.decoders[key] = SCHEMA_DECODERS[parse_type]
+
+            self.encoders[key] = SCHEMA_ENCODERS.get(parse_type, encode)
+
+
+codecs = {}
+codecs_lock = threading.Lock()
+
+
+def get_codec(cls):
+    """
+    Codec of the ParseObject class cls, compiled from cls.schema the first time and cached until
+    the schema of the class is replaced.
+    """
+    codec = codecs.get(cls, None)
+
+    if codec is None or codec.schema is not cls.schema:
+        with codecs_lock:
+            codec = codecs[cls] = ClassCodec(cls.schema)
+
+    return codec
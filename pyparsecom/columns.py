@@ -0,0 +1,154 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import six
+from collections import OrderedDict
+from .codec import DATE_ATTRIBUTES
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# schema types that map onto a typed array, any other type ends up in an object array
+TYPED = frozenset(['Number', 'Boolean', 'Date', 'GeoPoint', 'Pointer'])
+
+
+def kind_of(key, value):
+    """
+    Parse type of a raw attribute value, with whole numbers told apart from other numbers.
+    """
+    if isinstance(value, bool):
+        return 'Boolean'
+    if isinstance(value, six.integer_types):
+        return 'Integer'
+    if isinstance(value, float):
+        return 'Number'
+    if isinstance(value, six.string_types):
+        return 'Date' if key in DATE_ATTRIBUTES else 'String'
+    if isinstance(value, dict):
+        return value.get('__type', 'Dict')
+    return 'Array'
+
+
+def infer(key, values):
+    """
+    Column type of the raw values of key, None and missing values are ignored.
+    """
+    kinds = set(kind_of(key, v) for v in values if v is not None)
+
+    if kinds == set(['Integer']):
+        return 'Number' if None in values else 'Integer'
+    if kinds == set(['Integer', 'Number']):
+        return 'Number'
+    if kinds == set(['Boolean']):
+        return 'Object' if None in values else 'Boolean'
+    if kinds == set(['Pointer', 'Object']):
+        # a partially resolved pointer column
+        return 'Pointer'
+    if len(kinds) == 1 and list(kinds)[0] in TYPED:
+        return list(kinds)[0]
+    return 'Object'
+
+
+def to_integers(values):
+    return numpy.array(values, dtype=numpy.int64)
+
+
+def to_numbers(values):
+    return numpy.array([numpy.nan if v is None else v for v in values], dtype=numpy.float64)
+
+
+def to_booleans(values):
+    return numpy.array(values, dtype=bool)
+
+
+def to_dates(values):
+    # numpy parses the iso strings itself, the trailing Z is dropped as numpy has no timezones
+    return numpy.array([
+        'NaT' if v is None else (v['iso'] if isinstance(v, dict) else v)[:-1] for v in values
+    ], dtype='datetime64[ms]')
+
+
+def to_geo_points(values):
+    latitude = numpy.array([numpy.nan if v is None else v['latitude'] for v in values],
+                           dtype=numpy.float64)
+    longitude = numpy.array([numpy.nan if v is None else v['longitude'] for v in values],
+                            dtype=numpy.float64)
+    return latitude, longitude
+
+
+def to_object_ids(values):
+    return to_objects([None if v is None else v['objectId'] for v in values])
+
+
+def to_objects(values):
+    column = numpy.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+CONVERTERS = {
+    'Integer': to_integers,
+    'Number': to_numbers,
+    'Boolean': to_booleans,
+    'Date': to_dates,
+    'Pointer': to_object_ids
+}
+
+
+def to_columns(rows, fields, schema=None):
+    """
+    Turn raw rows, as returned by parse, into one array per field without decoding the rows
+    into objects. Numbers become int64 arrays, or float64 arrays with nan for missing values,
+    booleans become bool arrays, dates datetime64[ms] arrays with NaT for missing values, and
+    pointers an object array of their objectId. A GeoPoint field is split into two float64
+    arrays, <field>.latitude and <field>.longitude. Everything else is kept as is in an object
+    array.
+    :param rows: list of raw rows
+    :param fields: names of the attributes to export
+    :param schema: optional dict of attribute name to parse type, used instead of inferring the
+                   type from the values so that every page of a stream gets the same dtypes
+    :return: OrderedDict of column name to array
+    """
+    if numpy is None:
+        raise ImportError('columnar export requires numpy')
+
+    columns = OrderedDict()
+
+    for field in fields:
+        values = [row.get(field, None) for row in rows]
+
+        if schema is not None and field in schema:
+            kind = schema[field] if schema[field] in TYPED else 'Object'
+        elif field in DATE_ATTRIBUTES:
+            kind = 'Date'
+        else:
+            kind = infer(field, values)
+
+        if kind == 'GeoPoint':
+            latitude, longitude = to_geo_points(values)
+            columns[field + '.latitude'] = latitude
+            columns[field + '.longitude'] = longitude
+        else:
+            columns[field] = CONVERTERS.get(kind, to_objects)(values)
+
+    return columns
@@ -0,0 +1,216 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from .objects import BaseParseObject, ParseType
+import pyparsecom.codec
+
+
+class Missing(object):
+    def __repr__(self):
+        return '<missing>'
+
+
+# marks a field of the layout the object has no value for
+MISSING = Missing()
+
+
+class Layout(object):
+    """
+    Field names of a compact class and their position in the values of its objects. The layout
+    is shared by all objects of the class and only grows.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.fields = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.fields)
+
+    def position(self, name):
+        position = self.index.get(name, None)
+
+        if position is None:
+            with self.lock:
+                position = self.index.get(name, None)
+
+                if position is None:
+                    position = len(self.fields)
+                    self.fields.append(name)
+                    self.index[name] = position
+
+        return position
+
+
+class CompactParseObject(BaseParseObject):
+    """
+    ParseObject storing its attributes in a list laid out by a layout shared by its class instead
+    of an instance __dict__. The set of dirty keys is only allocated on the first change. Meant
+    for holding many read-mostly objects, subclass it instead of ParseObject:
+
+        class Reading(CompactParseObject):
+            pass
+    """
+
+    __slots__ = ('_values', '_dirty', '_is_loaded', '_client', '__weakref__')
+
+    _compact = True
+    _layouts_lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        object.__setattr__(self, '_values', [])
+        object.__setattr__(self, '_dirty', None)
+        object.__setattr__(self, '_is_loaded', False)
+
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+    @classmethod
+    def _get_layout(cls):
+        layout = cls.__dict__.get('_layout', None)
+
+        if layout is None:
+            with CompactParseObject._layouts_lock:
+                layout = cls.__dict__.get('_layout', None)
+
+                if layout is None:
+                    layout = Layout()
+                    type.__setattr__(cls, '_layout', layout)
+
+        return layout
+
+    @property
+    def _dirty_keys(self):
+        if self._dirty is None:
+            object.__setattr__(self, '_dirty', set())
+        return self._dirty
+
+    @property
+    def className(self):
+        return self.__class__.__name__
+
+    def __getattr__(self, key):
+        # only called when the attribute is not a slot or a class attribute
+        position = self.__class__._get_layout().index.get(key, None)
+        values = self._values
+
+        if position is None or position >= len(values) or values[position] is MISSING:
+            raise AttributeError(key)
+
+        return values[position]
+
+    def __setattr__(self, key, value):
+        if key in CompactParseObject.__slots__:
+            object.__setattr__(self, key, value)
+            return
+
+        if key not in self.__class__.PROTECTED_ATTRIBUTES:
+            self._dirty_keys.add(key)
+
+        previous = self._get(key)
+
+        if isinstance(previous, ParseType):
+            previous.remove_parent(self)
+
+        if isinstance(value, ParseType):
+            value.add_parent(parent=self, attribute=key)
+
+        self._set(key, value)
+
+    def __delattr__(self, key):
+        if key in self.__class__.PROTECTED_ATTRIBUTES:
+            return
+
+        previous = self._get(key)
+
+        if previous is MISSING:
+            raise AttributeError(key)
+
+        self._dirty_keys.add(key)
+
+        if isinstance(previous, ParseType):
+            previous.remove_parent(self)
+
+        self._set(key, MISSING)
+
+    def _get(self, key):
+        position = self.__class__._get_layout().index.get(key, None)
+
+        if position is None or position >= len(self._values):
+            return MISSING
+
+        return self._values[position]
+
+    def _set(self, key, value):
+        position = self.__class__._get_layout().position(key)
+        values = self._values
+
+        if position >= len(values):
+            values.extend([MISSING] * (position + 1 - len(values)))
+
+        values[position] = value
+
+    def _items(self):
+        """
+        Attribute names and values of the object.
+        """
+        for name, value in zip(self.__class__._get_layout().fields, self._values):
+            if value is not MISSING:
+                yield name, value
+
+    def _attribute_values(self):
+        return list(self._values)
+
+    @classmethod
+    def _hydrate(cls, response, is_loaded=True):
+        item = cls.__new__(cls)
+        layout = cls._get_layout()
+        decoders = pyparsecom.codec.get_codec(cls).decoders
+        decode = pyparsecom.codec.decode
+        values = [MISSING] * len(layout)
+
+        for k, v in response.items():
+            position = layout.position(k)
+
+            if position >= len(values):
+                values.extend([MISSING] * (position + 1 - len(values)))
+
+            decoder = decoders.get(k, None)
+            # complex types are linked to the object here rather than on each read, so that
+            # changing them marks the object dirty
+            values[position] = decode(item, k, v) if decoder is None else decoder(item, k, v)
+
+        object.__setattr__(item, '_values', values)
+        object.__setattr__(item, '_dirty', None)
+        object.__setattr__(item, '_is_loaded', is_loaded)
+
+        return item
+
+    def convert_from_native_to_parse(self):
+        data = {}
+        encoders = pyparsecom.codec.get_codec(self.__class__).encoders
+
+        for k, v in self._items():
+            data[k] = encoders.get(k, pyparsecom.codec.encode)(v)
+
+        return data
@@ -19,29 +19,125 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from requests import request
 import logging
 import json
-from .exceptions import ParseError, ParseResourceException
+import threading
+from six.moves.urllib.parse import urlparse
+from .exceptions import ParseError, ParseOutcomeUnknown, ParseResourceException
+from .retry import RetryPolicy
+from .transport import SessionTransport
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = None
+
+
+class ThreadLocalVar(object):
+    """
+    Stand-in for ContextVar on pythons without contextvars, the value is local to the thread.
+    """
+
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+        self.local = threading.local()
+
+    def get(self):
+        return getattr(self.local, 'value', self.default)
+
+    def set(self, value):
+        token = self.get()
+        self.local.value = value
+        return token
+
+    def reset(self, token):
+        self.local.value = token
+
+
+# session token and master key of the blocks of SessionToken and MasterKey entered in the current
+# context, innermost last, each merged with the ones around it. Each thread and each asyncio task
+# sees its own stack so concurrent requests cannot mix them up.
+_credentials = (ContextVar if ContextVar is not None else ThreadLocalVar)(
+    'pyparsecom_credentials', default=())
+
+# Parse instances entered with a with statement in the current context, innermost last
+_clients = (ContextVar if ContextVar is not None else ThreadLocalVar)(
+    'pyparsecom_clients', default=())
+
+
+class ParseResponse(dict):
+    """
+    Body of a response that came with an ETag, which can be sent back in If-None-Match to only
+    get the body again if it changed.
+    """
+
+    def __init__(self, body, etag):
+        super(ParseResponse, self).__init__(body)
+        self.etag = etag
 
 
 class Parse:
     """
-    Singleton class for initialization and handling parse rest api requests
+    Client of a parse app, handling its rest api requests. Parse.initialize sets up the default
+    client, Parse.Initialization. More clients can be created for other apps and used either by
+    binding objects and queries to them, or for everything in a with block:
+
+        other = Parse(application_id, rest_api_key, server_url='https://example.com/parse/')
+
+        with other:
+            City(name='Paris').save()
+
+        Query('City').bind(other).fetch()
     """
     server_url = 'https://api.parse.com/1/'
     allowed_routes = ['batch', 'classes', 'events', 'files', 'functions', 'login', 'logout', 'push',
                       'requestPasswordRest' 'rest_verify_analytics', 'users', 'jobs', 'config',
-                      'sessions', 'upgradeToRevocableSession']
+                      'sessions', 'upgradeToRevocableSession', 'schemas']
     max_attempts = 5
+    max_batch_size = 50
 
     Initialization = None
     Logger = None
 
-    def __init__(self, application_id, rest_api_key, master_key=None):
+    def __init__(self, application_id, rest_api_key, master_key=None, transport=None, cache=None,
+                 async_transport=None, server_url=None, retry_policy=None):
+        """
+        :param application_id: parse application id
+        :param rest_api_key: parse rest api key
+        :param master_key: optional master key
+        :param server_url: url of the parse server, defaults to Parse.server_url
+        :param transport: Transport used to send requests, defaults to a pooled SessionTransport
+        :param cache: optional Cache of query responses, see pyparsecom.cache
+        :param async_transport: transport used by the asyncio client, see pyparsecom.aio
+        :param retry_policy: RetryPolicy of failed requests, defaults to one allowing
+                             Parse.max_attempts attempts
+        """
         self.application_id = application_id
         self.rest_api_key = rest_api_key
         self.master_key = master_key
+        self.transport = transport if transport is not None else SessionTransport()
+        self.cache = cache
+        self.async_transport = async_transport
+        self.server_url = server_url if server_url is not None else Parse.server_url
+        self.retry_policy = retry_policy if retry_policy is not None else \
+            RetryPolicy(max_attempts=Parse.max_attempts)
+
+    def __enter__(self):
+        _clients.set(_clients.get() + (self,))
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        _clients.set(_clients.get()[:-1])
+
+    @classmethod
+    def current(cls):
+        """
+        Client of the innermost with block of the current context, Parse.Initialization outside
+        of any.
+        """
+        clients = _clients.get()
+        return clients[-1] if clients else cls.Initialization
 
     @classmethod
     def initialize(cls, *args, **kwargs):
@@ -51,7 +147,7 @@ class Parse:
             cls.Initialization.application_id = args[0]
             cls.Initialization.rest_api_key = args[1]
             for k, v in kwargs.items():
-                setattr(cls, k, v)
+                setattr(cls.Initialization, k, v)
 
         if Parse.Logger is None:
             Parse.Logger = logging.getLogger()
@@ -65,84 +161,220 @@ class Parse:
         return cls.Initialization
 
     def request(self, **kwargs):
+        """
+        Send a request to the parse rest api. Besides route, className, objectId, method, params,
+        data and headers, the options may hold a session_token or master_key used for this request
+        only, instead of the credentials of the current context and of the instance.
+        :return: body of the response
+        """
+        url, data, method, headers = self._prepare(**kwargs)
+        return self._send(url, data, method, headers)
+
+    def _effective_credentials(self, **kwargs):
+        """
+        Session token and master key a request with these options is sent with, from the options,
+        the current context or the instance. Only one of them is sent, the session token first.
+        :return: (session_token, master_key)
+        """
+        stack = _credentials.get()
+        credentials = stack[-1] if stack else {}
+        session_token = kwargs.get('session_token', credentials.get('session_token', None))
+        master_key = kwargs.get('master_key', credentials.get('master_key', self.master_key))
+        return session_token, master_key
+
+    def _prepare(self, **kwargs):
+        """
+        Url, json data, method and headers of a request, shared by the blocking and the asyncio
+        clients.
+        """
         route = kwargs.get('route', None)
         className = kwargs.get('className', None)
         params = kwargs.get('params', None)
         objectId = kwargs.get('objectId', None)
         method = kwargs.get('method', 'get')
         data = kwargs.get('data', None)
+        extra_headers = kwargs.get('headers', None)
+        session_token, master_key = self._effective_credentials(**kwargs)
 
-        if route not in Parse.allowed_routes:
-            raise ParseResourceException('%s is not allowed' % route)
-
-        url = Parse.server_url + route
-
-        if className is not None:
-            url += '/' + className
-
-        if objectId is not None:
-            url += '/' + objectId
+        url = self.server_url + self.path(route, className, objectId)
 
         if params is not None:
             url += '?%s' % params
 
-
         headers = {
             'Content-type': 'application/json',
             'X-Parse-Application-Id': self.application_id,
             'X-Parse-REST-API-Key': self.rest_api_key
         }
 
-        if hasattr(self, 'session_token'):
-            headers['X-Parse-Session-Token'] = self.session_token
-        elif hasattr(self, 'master_key'):
-            headers['X-Parse-Master-Key'] = self.master_key
+        if session_token is not None:
+            headers['X-Parse-Session-Token'] = session_token
+        elif master_key is not None:
+            headers['X-Parse-Master-Key'] = master_key
 
-        return self._send(url, json.dumps(data), method, headers)
+        if extra_headers is not None:
+            headers.update(extra_headers)
+
+        return url, json.dumps(data), method, headers
+
+    @staticmethod
+    def path(route, className=None, objectId=None):
+        """
+        Build the path of a resource relative to the server url.
+        """
+        if route not in Parse.allowed_routes:
+            raise ParseResourceException('%s is not allowed' % route)
+
+        path = route
+
+        if className is not None:
+            path += '/' + className
+
+        if objectId is not None:
+            path += '/' + objectId
+
+        return path
 
     def _send(self, url, data, method, headers):
-        attempts = 1
-        error = None
-        while attempts <= Parse.max_attempts:
+        policy = self.retry_policy
+        attempt = 1
+
+        while True:
+            try:
+                response = self.transport.send(method, url, data=data, headers=headers)
+            except Exception as e:
+                logging.getLogger(__name__).debug(e)
+                delay = policy.delay(method, attempt, error=e)
+
+                if delay is None:
+                    raise
+            else:
+                delay = policy.delay(method, attempt, response=response)
+
+                if delay is None:
+                    return self._handle(response)
+
+            policy.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _handle(response):
+        """
+        Body of a response sent by the server, raises a ParseError for error responses.
+        """
+        if response.status_code == 304:
+            # not modified since the ETag sent in If-None-Match
+            return None
+
+        if response.status_code not in [200, 201]:
+            raise ParseError(**response.json())
+
+        body = response.json()
+        etag = response.headers.get('ETag', None)
+
+        if etag is not None and isinstance(body, dict):
+            return ParseResponse(body, etag)
+
+        return body
+
+    def batch(self, requests):
+        """
+        Sends many operations through the batch route. Each operation is a dict of the options
+        accepted by request (route, className, objectId, method and data). Operations are split in
+        chunks of max_batch_size and the results are returned in the same order as the operations,
+        either the response of the operation or a ParseError if that operation failed. When the
+        request of a chunk fails as a whole, an error is the result of each of its operations and
+        the other chunks are still sent. The error is the one raised if the chunk was rejected by
+        the server or never reached it, its operations were not applied. Otherwise, such as after
+        a read timeout, the server may have applied any of them and the error is wrapped in a
+        ParseOutcomeUnknown: saving the objects of such operations again can create duplicates.
+        :param requests: list of request options
+        :return: list of responses and errors
+        """
+        results = []
+
+        for chunk in self._batch_chunks(requests):
             try:
-                response = request(url=url, data=data, method=method, headers=headers)
+                response = self.request(route='batch', method='POST', data={'requests': chunk})
             except Exception as e:
-                Parse.Logger.debug(e)
-                error = e
-                attempts += 1
+                logging.getLogger(__name__).debug(e)
+                results.extend([Parse._chunk_error(e)] * len(chunk))
             else:
-                if response.status_code not in [200, 201]:
-                    raise ParseError(**response.json())
+                results.extend(Parse._batch_results(response))
+
+        return results
+
+    def _batch_chunks(self, requests):
+        """
+        Operations of the batch route for requests, in chunks of max_batch_size.
+        """
+        base_path = urlparse(self.server_url).path
 
-                return response.json()
+        for start in range(0, len(requests), Parse.max_batch_size):
+            chunk = []
 
-        # return the error from the latest attempt
-        raise error
+            for options in requests[start:start + Parse.max_batch_size]:
+                operation = {
+                    'method': options.get('method', 'GET').upper(),
+                    'path': base_path + Parse.path(options.get('route', None),
+                                                   options.get('className', None),
+                                                   options.get('objectId', None))
+                }
 
-    def batch(self):
-        raise NotImplemented
+                if options.get('data', None) is not None:
+                    operation['body'] = options['data']
+
+                chunk.append(operation)
+
+            yield chunk
+
+    @staticmethod
+    def _chunk_error(error):
+        """
+        Result of the operations of a batch chunk whose request raised error.
+        """
+        if isinstance(error, ParseError) or RetryPolicy.is_unsent(error):
+            return error
+        return ParseOutcomeUnknown(error)
+
+    @staticmethod
+    def _batch_results(response):
+        return [result['success'] if 'success' in result else
+                ParseError(**result.get('error', {})) for result in response]
 
     @classmethod
     def get_initialization(cls):
         return cls.Initialization
 
-class SessionToken:
-    def __init__(self, session_token):
-        self.session_token = session_token
+class Credentials(object):
+    """
+    Context manager setting credentials for the requests sent in its block. They are kept in a
+    context variable rather than on the Parse instance, so other threads and asyncio tasks are not
+    affected and blocks can be nested. The instance keeps no state of its own, one instance can be
+    entered by several threads or tasks at once.
+    """
+
+    def __init__(self, **credentials):
+        self.credentials = credentials
 
     def __enter__(self):
-        Parse.Initialization.session_token = self.session_token
+        stack = _credentials.get()
+        current = stack[-1] if stack else {}
+        _credentials.set(stack + (dict(current, **self.credentials),))
+        return self
 
     def __exit__(self, *args, **kwargs):
-        del Parse.Initialization.session_token
+        _credentials.set(_credentials.get()[:-1])
 
 
-class MasterKey:
-    def __init__(self, master_key):
-        self.master_key = master_key
+class SessionToken(Credentials):
+    def __init__(self, session_token):
+        super(SessionToken, self).__init__(session_token=session_token)
+        self.session_token = session_token
 
-    def __enter__(self):
-        Parse.Initialization.master_key = self.master_key
 
-    def __exit__(self, *args, **kwargs):
-        del Parse.Initialization.master_key
\ No newline at end of file
+class MasterKey(Credentials):
+    def __init__(self, master_key):
+        # a master key takes precedence over the session token of an enclosing block
+        super(MasterKey, self).__init__(master_key=master_key, session_token=None)
+        self.master_key = master_key
@@ -35,3 +35,11 @@ class ParseResourceException(Exception):
 class ParseClassDoesNotExist(Exception):
     pass
 
+class ParseOutcomeUnknown(Exception):
+    """
+    A request failed after it may have reached the server, which may or may not have applied it.
+    The error raised by the transport is kept in error.
+    """
+    def __init__(self, error):
+        self.error = error
+        super(ParseOutcomeUnknown, self).__init__('outcome unknown: %s' % error)
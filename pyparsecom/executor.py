@@ -0,0 +1,125 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .query import Query
+
+try:
+    from contextvars import copy_context
+except ImportError:
+    copy_context = None
+
+
+class Executor(object):
+    """
+    Runs independent requests in parallel on a pool of threads. Tasks are Queries, which are
+    fetched, or callables such as the bound methods of objects and queries:
+
+        with Executor() as executor:
+            cities, count, _ = executor.map([Query('City'), Query('Person').count, paris.save])
+
+    The threads send their requests with the transport of the client of each task, so they share
+    its connection pool; keep the concurrency at or below the pool size of the transport to reuse
+    every connection. Tasks run with the credentials, client and IdentityMap of the context that
+    submitted them.
+    """
+
+    def __init__(self, max_workers=10):
+        """
+        :param max_workers: number of threads, the highest concurrency of a call
+        """
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+
+    def map(self, tasks, concurrency=None, return_exceptions=False):
+        """
+        Run tasks and return their results in the order of the tasks.
+        :param tasks: list of Queries and callables
+        :param concurrency: maximum number of tasks running at once, defaults to max_workers
+        :param return_exceptions: return the exception of a failed task as its result instead of
+                                  raising it
+        :return: list of results
+        """
+        results = [None] * len(tasks)
+
+        for position, result in self.as_completed(tasks, concurrency, return_exceptions):
+            results[position] = result
+
+        return results
+
+    def as_completed(self, tasks, concurrency=None, return_exceptions=False):
+        """
+        Run tasks and yield their results as they complete. A task is only started once a slot
+        is free, so no more than concurrency requests are in flight at any time. When the caller
+        stops iterating, tasks not started yet are not run.
+        :param tasks: list of Queries and callables
+        :param concurrency: maximum number of tasks running at once, defaults to max_workers
+        :param return_exceptions: yield the exception of a failed task as its result instead of
+                                  raising it
+        :return: generator of (position of the task, result)
+        """
+        limit = min(concurrency or self.max_workers, self.max_workers)
+        waiting = iter(enumerate(tasks))
+        running = {}
+
+        def start():
+            for position, task in waiting:
+                running[self.submit(task)] = position
+                return
+
+        for _ in range(limit):
+            start()
+
+        while running:
+            done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                position = running.pop(future)
+                start()
+
+                error = future.exception()
+
+                if error is not None and not return_exceptions:
+                    raise error
+
+                yield position, future.result() if error is None else error
+
+    def submit(self, task):
+        """
+        Start a single task.
+        :return: Future of its result
+        """
+        call = task.fetch if isinstance(task, Query) else task
+
+        if copy_context is not None:
+            # the task sees the credentials and client of the submitting context
+            return self.pool.submit(copy_context().run, call)
+
+        return self.pool.submit(call)
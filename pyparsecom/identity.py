@@ -0,0 +1,147 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from .core import ContextVar, ThreadLocalVar
+
+# identity maps entered in the current context, innermost last. Each asyncio task sees its own
+# stack, tasks and threads started with the context of a unit of work share its identity map.
+_stack = (ContextVar if ContextVar is not None else ThreadLocalVar)(
+    'pyparsecom_identity_maps', default=())
+
+
+class IdentityMap(object):
+    """
+    Unit of work in which every object is only ever represented by one instance. Objects created
+    from server data are kept by parse class name and objectId, data received again for a kept
+    object is merged into the existing instance, and lookups of loaded objects with Query.get and
+    ParseObject.fetch do not send a request:
+
+        with IdentityMap():
+            city = Query('City').get(objectId)
+            assert Query('City').get(objectId) is city
+
+    Identity maps can be nested, the innermost one is used. Like credentials, an identity map is
+    only active in the context that entered it: its thread or asyncio task, and the threads that
+    run a copy of that context such as the tasks of an Executor.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.RLock()
+
+    def __enter__(self):
+        _stack.set(_stack.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _stack.set(tuple(item for item in _stack.get() if item is not self))
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, item):
+        return self.objects.get(IdentityMap.key(item), None) is item
+
+    @staticmethod
+    def current():
+        """
+        Identity map of the innermost unit of work of the context, None outside of one.
+        """
+        stack = _stack.get()
+        return stack[-1] if stack else None
+
+    @staticmethod
+    def key(item):
+        return (item.className, getattr(item, '_asynchronous', False),
+                getattr(item, 'objectId', None))
+
+    @staticmethod
+    def class_name(cls):
+        """
+        Parse class name of the model cls, which differs from the python name for classes such as
+        User which declare the parse name in __name__.
+        """
+        for klass in cls.__mro__:
+            if '__name__' in vars(klass):
+                return vars(klass)['__name__']
+        return cls.__name__
+
+    def get(self, className, objectId, asynchronous=False):
+        """
+        :param className: parse class name
+        :param asynchronous: whether the instance is a model of the asyncio client
+        :return: the instance kept for the object, None if there is none
+        """
+        return self.objects.get((className, asynchronous, objectId), None)
+
+    def add(self, item):
+        """
+        Keep item unless an instance is already kept for the object.
+        :return: the instance kept for the object
+        """
+        with self.lock:
+            return self.objects.setdefault(IdentityMap.key(item), item)
+
+    def discard(self, item):
+        key = IdentityMap.key(item)
+
+        with self.lock:
+            if self.objects.get(key, None) is item:
+                del self.objects[key]
+
+    def clear(self):
+        self.objects.clear()
+
+    def hydrate(self, cls, response, is_loaded=True):
+        """
+        Instance for the server data response, the kept instance with response merged into it
+        when there is one, otherwise a new instance which is then kept.
+        """
+        with self.lock:
+            key = (IdentityMap.class_name(cls), getattr(cls, '_asynchronous', False),
+                   response.get('objectId', None))
+            item = self.objects.get(key, None)
+
+            if item is None:
+                item = cls._hydrate(response, is_loaded=is_loaded)
+
+                if hasattr(item, 'objectId'):
+                    self.objects[IdentityMap.key(item)] = item
+
+                return item
+
+            IdentityMap.merge(item, response, is_loaded)
+
+        return item
+
+    @staticmethod
+    def merge(item, response, is_loaded=True):
+        """
+        Merge server data into item, without overwriting attributes changed locally.
+        """
+        dirty_keys = item._dirty_keys
+
+        if dirty_keys:
+            response = dict((k, v) for k, v in response.items() if k not in dirty_keys)
+
+        item.convert_from_parse_to_native(response, item=item,
+                                          is_loaded=is_loaded or item._is_loaded)
@@ -22,22 +22,61 @@
 from six import add_metaclass
 from .core import Parse
 from .exceptions import ParseClassDoesNotExist, ParseResourceException
+from .identity import IdentityMap
 
 
 class ComplexTypeMeta(type):
     register = {}
+    # classes of the asyncio client, registered apart so that a parse class can have both a
+    # blocking and an asyncio model
+    async_register = {}
 
     def __new__(mcs, name, bases, class_dict):
-        if name not in mcs.register:
+        asynchronous = class_dict.get('_asynchronous',
+                                      any(getattr(b, '_asynchronous', False) for b in bases))
+        register = mcs.async_register if asynchronous else mcs.register
+
+        if name not in register:
+            # subclasses of compact classes stay without an instance __dict__
+            if '__slots__' not in class_dict and any(getattr(b, '_compact', False) for b in bases):
+                class_dict['__slots__'] = ()
+
             cls = type.__new__(mcs, name, bases, class_dict)
-            mcs.register[name] = cls
-        return mcs.register[name]
+            register[name] = cls
+
+            # classes mapped to a parse class of another name, such as User for _User, are also
+            # found under the parse name
+            for klass in cls.__mro__:
+                if '__name__' in vars(klass):
+                    register.setdefault(vars(klass)['__name__'], cls)
+                    break
+        return register[name]
+
+    @classmethod
+    def get_class(mcs, name, asynchronous=False):
+        """
+        Registered class of the parse type or class name.
+        :param asynchronous: look for a class of the asyncio client first
+        """
+        cls = mcs.async_register.get(name, None) if asynchronous else None
+
+        if cls is None:
+            cls = mcs.register.get(name, None)
+
+        if cls is None:
+            raise ParseClassDoesNotExist('%s does not exist' % name)
+
+        return cls
 
 
 @add_metaclass(ComplexTypeMeta)
 class ParseType(object):
     PROTECTED_ATTRIBUTES = ['_dirty_keys', '_is_loaded', 'objectId', 'createdAt',
-                            'updatedAt', '__type', 'className', '_parents']
+                            'updatedAt', '__type', 'className', '_parents', '_etag',
+                            '_client']
+
+    # no storage of its own so that compact subclasses can do without an instance __dict__
+    __slots__ = ()
 
     def __init__(self, **kwargs):
         for k, v in kwargs.items():
@@ -60,7 +99,7 @@ class ParseType(object):
     def add_parent(self, parent, attribute):
 
         # parse objects only store pointers
-        if isinstance(self, ParseObject):
+        if isinstance(self, BaseParseObject):
             return
 
         if not hasattr(self, '_parents'):
@@ -79,8 +118,7 @@ class ParseType(object):
         :return:
         """
         if hasattr(self, '_parents'):
-            for parent in self._parents.keys():
-                attribute = self._parents[parent]
+            for parent, attribute in list(self._parents.items()):
                 if attribute in self.__class__.PROTECTED_ATTRIBUTES:
                     continue
 
@@ -91,12 +129,33 @@ class ParseType(object):
                 parent._dirty_keys.add(attribute)
 
 
-class ParseObject(ParseType):
+class BaseParseObject(ParseType):
+    """
+    Behaviour shared by every parse object, whatever stores its attributes. It has no storage of
+    its own: ParseObject keeps the attributes in an instance __dict__ and CompactParseObject in
+    slots. Subclass ParseObject or CompactParseObject rather than this class.
+    """
+
+    # maximum number of objects fetched by a single query in fetch_all
+    max_fetch_size = 1000
+
+    # optional mapping of attribute name to parse schema type, such as {'name': 'String'}, used
+    # to compile a decoder and encoder for the class, see load_schema
+    schema = None
+
+    # Parse instance the requests of the class are sent with, None for Parse.current(), see bind
+    _client = None
+
+    # whether the class belongs to the asyncio client, see pyparsecom.aio
+    _asynchronous = False
+
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         self._dirty_keys = set([])
         self._is_loaded = False
 
-        super(ParseObject, self).__init__(**kwargs)
+        super(BaseParseObject, self).__init__(**kwargs)
 
         if not hasattr(self, 'className'):
             self.className = self.__class__.__name__
@@ -118,7 +177,7 @@ class ParseObject(ParseType):
         if isinstance(value, ParseType):
             value.add_parent(parent=self, attribute=key)
 
-        super(ParseObject, self).__setattr__(key, value)
+        super(BaseParseObject, self).__setattr__(key, value)
 
     def __delattr__(self, key):
         """
@@ -132,29 +191,119 @@ class ParseObject(ParseType):
             if isinstance(getattr(self, key, None), ParseType):
                 getattr(self, key).remove_parent(self)
 
-            super(ParseObject, self).__delattr__(key)
+            super(BaseParseObject, self).__delattr__(key)
 
     def fetch(self):
+        if self._is_kept():
+            return
+
+        response = self._get_client().request(**self._fetch_options())
+        self._apply_fetch(response)
+
+    def _is_kept(self):
+        """
+        Whether the object is kept loaded by the current IdentityMap, in which case it is not
+        fetched again.
+        """
         if not hasattr(self, 'objectId'):
             raise ParseResourceException('no objectId')  # cannot fetch without id
 
-        options = {
+        identity_map = IdentityMap.current()
+
+        return identity_map is not None and self._is_loaded and self in identity_map
+
+    def _fetch_options(self):
+        return {
             'route': 'classes',
             'className': self.__class__.__name__,
             'method': 'GET',
             'objectId': self.objectId
         }
 
-        response = Parse.Initialization.request(**options)
+    def _apply_fetch(self, response):
+        ParseObject.convert_from_parse_to_native(response, item=self, is_loaded=True)
+        self._keep_etag(response)
+
+        if getattr(self, '_client', None) is not None:
+            # objects included in the response belong to the same app
+            self.bind(self._client)
+
+        identity_map = IdentityMap.current()
+
+        if identity_map is not None:
+            identity_map.add(self)
+
+    def refresh(self):
+        """
+        Fetch the object only if it changed on the server. If the server sent an ETag with the
+        object it is sent back in If-None-Match, otherwise a loaded object is only sent again if
+        its updatedAt is more recent. An object that is not loaded is fetched.
+        :return: True if the object changed, False otherwise
+        """
+        if not hasattr(self, 'objectId'):
+            raise ParseResourceException('no objectId')  # cannot fetch without id
+
+        etag = getattr(self, '_etag', None)
+
+        if etag is not None:
+            options = {
+                'route': 'classes',
+                'className': self.__class__.__name__,
+                'method': 'GET',
+                'objectId': self.objectId,
+                'headers': {'If-None-Match': etag}
+            }
+
+            response = self._get_client().request(**options)
+
+            if response is None:
+                return False
+
+            self._keep_etag(response)
+
+            return self._merge_if_changed(response)
+
+        if not self._is_loaded or not hasattr(self, 'updatedAt'):
+            self.fetch()
+            return True
+
+        query = pyparsecom.query.Query(self.className, client=self._get_client())
+        query = query.equal_to('objectId', self.objectId)
+        query = query.greater_than('updatedAt', pyparsecom.types.Date(self.updatedAt)).limit(1)
+        results = query._find(query.build(), cached=False)['results']
+
+        return len(results) > 0 and self._merge_if_changed(results[0])
+
+    def _merge_if_changed(self, response):
+        # updatedAt changes with every write, an equal one means the payload is the same and
+        # decoding it again can be skipped
+        updatedAt = response.get('updatedAt', None)
+
+        if self._is_loaded and updatedAt is not None and \
+                pyparsecom.types.Date.from_str(updatedAt) == getattr(self, 'updatedAt', None):
+            return False
 
         ParseObject.convert_from_parse_to_native(response, item=self, is_loaded=True)
 
+        return True
+
+    def _keep_etag(self, response):
+        etag = getattr(response, 'etag', None)
+
+        if etag is not None:
+            self._etag = etag
+
     def save(self):
         """
         Saves all dirty attributes of the object to Parse. After, dirty keys are cleared. However
         Parse does not return the other attributes and therefore the object is not marked as loaded.
         :return:
         """
+        dirty_keys = list(self._dirty_keys)
+        response = self._get_client().request(**self._save_options())
+        self._apply_save(response, dirty_keys)
+
+    def _save_options(self):
         options = {
             'route': 'classes',
             'className': self.__class__.__name__,
@@ -167,37 +316,224 @@ class ParseObject(ParseType):
             options['method'] = 'PUT'
             options['objectId'] = self.objectId
 
-        response = Parse.Initialization.request(**options)
+        return options
+
+    def _apply_save(self, response, dirty_keys):
+        """
+        Merges the response of a save into the object and clears the keys that were saved.
+        :param response: response of the save request
+        :param dirty_keys: keys that were dirty when the save was sent
+        :return:
+        """
         ParseObject.convert_from_parse_to_native(response, item=self, is_loaded=False)
-        self._dirty_keys.clear()
+        self._dirty_keys.difference_update(dirty_keys)
+        self._invalidate_cache()
+
+        identity_map = IdentityMap.current()
+
+        if identity_map is not None:
+            identity_map.add(self)
 
     def delete(self):
         """
         Delete the object from Parse. It still exists locally.
         :return:
         """
-        options = {
+        self._get_client().request(**self._delete_options())
+        self._apply_delete()
+
+    def _delete_options(self):
+        return {
             'route': 'classes',
             'className': self.className,
             'objectId': self.objectId,
             'method': 'DELETE'
         }
 
-        Parse.Initialization.request(**options)
+    def _apply_delete(self):
+        self._invalidate_cache()
+
+        identity_map = IdentityMap.current()
+
+        if identity_map is not None:
+            identity_map.discard(self)
+
+    def _invalidate_cache(self):
+        cache = self._get_client().cache
+
+        if cache is not None:
+            # queries name the class after the python class, included objects after className
+            for className in set([self.__class__.__name__, self.className]):
+                cache.invalidate(className)
+
+    def bind(self, client):
+        """
+        Send the requests of the object with client instead of Parse.current(). The objects held
+        by its attributes that are not bound yet, such as those loaded by include or resolve, are
+        bound to client too.
+        :param client: Parse instance
+        :return: self
+        """
+        self._client = client
+
+        for item in self._referenced():
+            if getattr(item, '_client', None) is None:
+                item.bind(client)
+
+        return self
+
+    def _referenced(self):
+        """
+        ParseObjects held by the attributes of the object, directly or in lists.
+        """
+        for value in self._attribute_values():
+            for item in (value if isinstance(value, list) else [value]):
+                if isinstance(item, BaseParseObject):
+                    yield item
+
+    def _attribute_values(self):
+        raise NotImplementedError()
+
+    def _get_client(self):
+        client = getattr(self, '_client', None)
+        return client if client is not None else Parse.current()
+
+    @classmethod
+    def load_schema(cls):
+        """
+        Load the schema of the class from the server, which requires the master key, and use it
+        to decode and encode the class from now on.
+        :return: schema
+        """
+        options = {
+            'route': 'schemas',
+            'className': cls.__name__,
+            'method': 'GET'
+        }
+
+        response = (cls._client if cls._client is not None else Parse.current()).request(**options)
+
+        cls.schema = dict((k, v['type']) for k, v in response['fields'].items())
+
+        return cls.schema
 
     @staticmethod
-    def convert_from_parse_to_native(response, className=None, item=None, is_loaded=True):
+    def save_all(objects):
+        """
+        Save many objects using batch requests.
+        :param objects: list of ParseObjects
+        :return: list with an error for each failed save and None for each success
+        """
+        batch = Batch()
+        for item in objects:
+            batch.save(item)
+        return batch.commit()
 
-        if item is None:
-            cls = ComplexTypeMeta.register.get(className, None)
+    @staticmethod
+    def delete_all(objects):
+        """
+        Delete many objects using batch requests.
+        :param objects: list of ParseObjects
+        :return: list with an error for each failed delete and None for each success
+        """
+        batch = Batch()
+        for item in objects:
+            batch.delete(item)
+        return batch.commit()
+
+    @staticmethod
+    def fetch_all(objects):
+        """
+        Fetch many objects with a single $in query on objectId per class and merge the results
+        into the given instances, without overwriting attributes changed locally and not saved
+        yet. Objects that no longer exist on the server are left unchanged.
+        :param objects: list of ParseObjects
+        :return: objects
+        """
+        pending = {}
+
+        for item in objects:
+            if not hasattr(item, 'objectId'):
+                raise ParseResourceException('no objectId')  # cannot fetch without id
+
+            key = (item._get_client(), item.className)
+            pending.setdefault(key, {}).setdefault(item.objectId, []).append(item)
+
+        for (client, className), items in pending.items():
+            objectIds = list(items.keys())
+
+            for start in range(0, len(objectIds), ParseObject.max_fetch_size):
+                chunk = objectIds[start:start + ParseObject.max_fetch_size]
+                query = pyparsecom.query.Query(className, client=client)
+                query = query.contained_in('objectId', chunk).limit(len(chunk))
+
+                for row in query._find(query.build(), cached=False)['results']:
+                    for item in items.get(row['objectId'], []):
+                        IdentityMap.merge(item, row, is_loaded=True)
+
+        return objects
+
+    @staticmethod
+    def refresh_all(objects):
+        """
+        Refresh many objects, see refresh. Loaded objects are refreshed with a single $in query
+        on objectId per class, restricted to objects updated after the oldest updatedAt among
+        them, so unchanged objects are mostly not sent again. Objects that are not loaded are
+        fetched with fetch_all.
+        :param objects: list of ParseObjects
+        :return: list of the objects that changed
+        """
+        pending = {}
+        unloaded = []
+
+        for item in objects:
+            if not hasattr(item, 'objectId'):
+                raise ParseResourceException('no objectId')  # cannot fetch without id
+
+            if item._is_loaded and hasattr(item, 'updatedAt'):
+                key = (item._get_client(), item.className)
+                pending.setdefault(key, {}).setdefault(item.objectId, []).append(item)
+            else:
+                unloaded.append(item)
+
+        changed = ParseObject.fetch_all(unloaded)
+
+        for (client, className), items in pending.items():
+            objectIds = list(items.keys())
 
-            if cls is None:
-                raise ParseClassDoesNotExist('%s does not exist' % className)
+            for start in range(0, len(objectIds), ParseObject.max_fetch_size):
+                chunk = objectIds[start:start + ParseObject.max_fetch_size]
+                since = min(item.updatedAt for objectId in chunk for item in items[objectId])
 
-            item = type(className, (cls,), {})()
+                query = pyparsecom.query.Query(className, client=client)
+                query = query.contained_in('objectId', chunk)
+                query = query.greater_than('updatedAt', pyparsecom.types.Date(since))
+                query = query.limit(len(chunk))
+
+                for row in query._find(query.build(), cached=False)['results']:
+                    for item in items.get(row['objectId'], []):
+                        if item._merge_if_changed(row):
+                            changed.append(item)
+
+        return changed
+
+    @staticmethod
+    def convert_from_parse_to_native(response, className=None, item=None, is_loaded=True,
+                                     asynchronous=False):
+
+        if item is None:
+            return ComplexTypeMeta.get_class(className, asynchronous).hydrate(response,
+                                                                              is_loaded=is_loaded)
+
+        decoders = pyparsecom.codec.get_codec(item.__class__).decoders
 
         for k, v in response.items():
-            setattr(item, k, item.convert_attribute_from_parse_to_native(k, v))
+            decoder = decoders.get(k, None)
+
+            if decoder is None:
+                setattr(item, k, item.convert_attribute_from_parse_to_native(k, v))
+            else:
+                setattr(item, k, decoder(item, k, v))
 
             if k in item._dirty_keys:
                 item._dirty_keys.remove(k)
@@ -206,18 +542,21 @@ class ParseObject(ParseType):
 
         return item
 
-    def convert_from_native_to_parse(self):
-        data = {}
+    @classmethod
+    def hydrate(cls, response, is_loaded=True):
+        """
+        Create an object of the class from data sent by the server. Inside an IdentityMap the
+        instance already kept for the object is returned instead, with response merged into it.
+        :param response: attributes as sent by parse
+        :param is_loaded: whether response holds all the attributes of the object
+        :return: ParseObject
+        """
+        identity_map = IdentityMap.current()
 
-        for k, v in self.__dict__.items():
-            if isinstance(v, ParseObject):
-                data[k] = v.to_pointer().convert_from_native_to_parse()
-            elif isinstance(v, ParseType):
-                data[k] = v.convert_from_native_to_parse()
-            else:
-                data[k] = v
+        if identity_map is not None:
+            return identity_map.hydrate(cls, response, is_loaded=is_loaded)
 
-        return data
+        return cls._hydrate(response, is_loaded=is_loaded)
 
     def convert_attribute_from_parse_to_native(self, key, data):
         """
@@ -226,55 +565,135 @@ class ParseObject(ParseType):
         :param data: attribute data
         :return:
         """
+        return pyparsecom.codec.decode(self, key, data)
 
-        # cast to data if possible
-        try:
-            data = pyparsecom.types.Date.from_str(data)
-        except Exception as e:
-            pass
-        else:
-            return data
+    def to_pointer(self):
+        if not hasattr(self, 'objectId'):
+            self.save()
 
-        # if not a dict it cannot be a complex type
-        if not isinstance(data, dict):
-            return data
+        return pyparsecom.types.Pointer(className=self.className, objectId=self.objectId)
 
-        # get the complex type
-        if '__type' in data:
-            parse_type = str(data.pop('__type'))
-        elif key == 'ACL':
-            parse_type = 'ACL'
-        else:
-            return data
 
-        # get the python class for the typ
-        cls = ComplexTypeMeta.register.get(parse_type, None)
+class ParseObject(BaseParseObject):
+    """
+    Parse object keeping its attributes in an instance __dict__, subclass it for each parse class.
+    """
 
-        if cls is None:
-            raise ParseClassDoesNotExist('%s does not exist', parse_type)
+    def _attribute_values(self):
+        return list(self.__dict__.values())
 
-        # instantiate the object
-        item = type(parse_type, (cls,), {})(**data)
+    @classmethod
+    def _hydrate(cls, response, is_loaded=True):
+        # since every attribute comes from the server nothing is dirty, so the attributes are
+        # stored directly instead of going through __init__ and the dirty tracking of __setattr__
+        item = cls.__new__(cls)
+        state = item.__dict__
+        state['_dirty_keys'] = set()
+        state['_is_loaded'] = is_loaded
 
-        # add parent to the object so that when this object is updated, the parent is marked as
-        # dirty
-        item.add_parent(parent=self, attribute=key)
+        if not hasattr(cls, 'className'):
+            state['className'] = cls.__name__
+
+        decoders = pyparsecom.codec.get_codec(cls).decoders
+        convert = item.convert_attribute_from_parse_to_native
+
+        for k, v in response.items():
+            decoder = decoders.get(k, None)
+            state[k] = convert(k, v) if decoder is None else decoder(item, k, v)
 
         return item
 
-    def to_pointer(self):
-        if not hasattr(self, 'objectId'):
-            self.save()
+    def convert_from_native_to_parse(self):
+        data = {}
+        encoders = pyparsecom.codec.get_codec(self.__class__).encoders
 
-        cls = ComplexTypeMeta.register.get('Pointer', None)
+        for k, v in self.__dict__.items():
+            data[k] = encoders.get(k, pyparsecom.codec.encode)(v)
 
-        if cls is None:
-            raise ParseClassDoesNotExist('Pointer does not exist')
+        return data
+
+
+class Batch(object):
+    """
+    Collects save and delete operations of many objects and sends them with Parse.batch, which
+    needs one request per max_batch_size operations instead of one request per object.
+    """
+
+    def __init__(self):
+        self.operations = []
+
+    def __len__(self):
+        return len(self.operations)
+
+    def save(self, item):
+        """
+        Queue the creation or update of the dirty attributes of item.
+        """
+        self.operations.append((item, item._save_options(), list(item._dirty_keys)))
+
+    def delete(self, item):
+        """
+        Queue the deletion of item.
+        """
+        self.operations.append((item, item._delete_options(), None))
+
+    def commit(self):
+        """
+        Send all queued operations and merge the results back into their objects. A failing
+        operation does not stop the others, its error is returned instead. That is a ParseError,
+        or the error of its whole chunk as described in Parse.batch.
+        :return: list with an error for each failed operation and None for each success, in
+                 the order the operations were queued
+        """
+        operations, self.operations = self.operations, []
+        results = [None] * len(operations)
+
+        for client, positions in Batch._clients(operations).items():
+            responses = client.batch([operations[i][1] for i in positions])
+
+            for i, response in zip(positions, responses):
+                results[i] = response
+
+        return Batch._apply(operations, results)
+
+    @staticmethod
+    def _clients(operations):
+        """
+        Positions of the operations grouped by the client of their object, each group is sent
+        as its own batch.
+        """
+        clients = {}
+
+        for i, (item, options, dirty_keys) in enumerate(operations):
+            clients.setdefault(item._get_client(), []).append(i)
+
+        return clients
+
+    @staticmethod
+    def _apply(operations, results):
+        """
+        Merge the results of a batch into the objects of its operations.
+        :return: list with an error for each failed operation and None for each success
+        """
+        errors = []
+
+        for (item, options, dirty_keys), result in zip(operations, results):
+            if isinstance(result, Exception):
+                errors.append(result)
+                continue
+
+            if options['method'] == 'DELETE':
+                item._apply_delete()
+            else:
+                item._apply_save(result, dirty_keys)
+
+            errors.append(None)
 
-        return type('Pointer', (cls,), {})(className=self.className,
-                                           objectId=self.objectId)
+        return errors
 
 
 # register types
 import pyparsecom.types
-import pyparsecom.user
\ No newline at end of file
+import pyparsecom.user
+import pyparsecom.query
+import pyparsecom.codec
\ No newline at end of file
@@ -19,17 +19,30 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from six.moves.urllib.parse import urlencode
+from six.moves.urllib.parse import urlencode, quote_plus
+from six.moves import queue
+from collections import OrderedDict
 import json
-from copy import deepcopy
+import re
+import threading
 from .core import Parse
-from .objects import ParseObject, ParseType, ComplexTypeMeta
-from .exceptions import ParseClassDoesNotExist
+from .objects import BaseParseObject, ParseObject, ParseType, ComplexTypeMeta
+from .exceptions import ParseResourceException
+from .identity import IdentityMap
+from .cache import Cache
+from . import columns
+
+try:
+    from contextvars import copy_context
+except ImportError:
+    copy_context = None
 
 
 class ParseObjectEncoder(json.JSONEncoder):
     def default(self, o):
-        if isinstance(o, ParseObject):
+        if isinstance(o, Param):
+            return o.marker
+        elif isinstance(o, BaseParseObject):
             return o.to_pointer().__dict__
         elif isinstance(o, ParseType):
             return o.to_json()
@@ -37,17 +50,132 @@ class ParseObjectEncoder(json.JSONEncoder):
             return json.JSONEncoder.default(self, o)
 
 
-class Query(object):
+class Param(object):
+    """
+    Named placeholder for a where value of a compiled query, see Query.compile.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.marker = '\x00%s\x00' % name
+
+    def __repr__(self):
+        return '<Param:%s>' % self.name
+
 
-    def __init__(self, className):
+class Query(object):
+    """
+    Queries are immutable, every builder method returns a new Query. Rather than copying its
+    parameters, a derived query only keeps a reference to the query it was built from and the
+    single change it adds, so chaining is cheap whatever the size of the values. The parameters
+    are assembled the first time they are needed and kept.
+    """
+    # Parse instance the query is sent with, None for Parse.current(), see bind
+    _client = None
+
+    # whether results are objects of the classes of the asyncio client
+    _asynchronous = False
+
+    def __init__(self, className, client=None):
+        """
+        :param className: name of the class queried
+        :param client: Parse instance the query is sent with, defaults to Parse.current()
+        """
         self.className = className
-        self.params = {
+        self._client = client
+        self._parent = None
+        self._op = None
+        self._where_keys = frozenset()
+        self._template = None
+        self._params = {
             'where': {},
             'order': []
         }
 
+    def _derive(self, op):
+        q = self.__class__.__new__(self.__class__)
+        q.__dict__.update(self.__dict__)
+        q._parent = self
+        q._op = op
+        q._params = None
+        q._template = None
+        return q
+
+    def bind(self, client):
+        """
+        Query sent with client instead of Parse.current(), the objects it returns are bound to
+        client as well.
+        :param client: Parse instance
+        :return: Query
+        """
+        q = self.__class__.__new__(self.__class__)
+        q.__dict__.update(self.__dict__)
+        q._client = client
+        q._template = None
+        return q
+
+    def _get_client(self):
+        return self._client if self._client is not None else Parse.current()
+
+    def _set(self, key, value):
+        return self._derive(('set', key, value))
+
+    def _unset(self, key):
+        return self._derive(('unset', key))
+
+    def _append(self, key, value):
+        return self._derive(('append', key, value))
+
+    def _where(self, attribute, operator, value):
+        q = self._derive(('where', attribute, operator, value))
+
+        if attribute not in self._where_keys:
+            q._where_keys = self._where_keys | frozenset([attribute])
+
+        return q
+
+    @property
+    def params(self):
+        if self._params is None:
+            ops = []
+            node = self
+
+            while node._params is None:
+                ops.append(node._op)
+                node = node._parent
+
+            params = dict(node._params)
+            params['where'] = dict(params['where'])
+
+            for op in reversed(ops):
+                Query._apply(params, op)
+
+            self._params = params
+
+        return self._params
+
+    @staticmethod
+    def _apply(params, op):
+        if op[0] == 'set':
+            params[op[1]] = op[2]
+        elif op[0] == 'unset':
+            params.pop(op[1], None)
+        elif op[0] == 'append':
+            params[op[1]] = params.get(op[1], []) + [op[2]]
+        else:
+            attribute, operator, value = op[1:]
+            where = params['where']
+
+            if operator is None:
+                where[attribute] = value
+            else:
+                # constraints are shared with other queries, replace rather than update them
+                constraint = dict(where.get(attribute, {}))
+                constraint[operator] = value
+                where[attribute] = constraint
+
     def build(self):
-        params = deepcopy(self.params)
+        params = dict(self.params)
 
         if len(params['where']) == 0:
             del params['where']
@@ -62,27 +190,272 @@ class Query(object):
         if 'keys' in params:
             params['keys'] = ','.join(params['keys'])
 
+        if 'include' in params:
+            params['include'] = ','.join(params['include'])
+
         return urlencode(params)
 
+    def compile(self):
+        """
+        Compile the query into a reusable QueryTemplate. Values in the where clause may be Param
+        placeholders that are bound each time the template is used, the rest of the query is
+        encoded once. Equal queries share the same cached template.
+        :return: QueryTemplate
+        """
+        if getattr(self, '_template', None) is None:
+            self._template = QueryTemplate.get(self)
+
+        return self._template
+
     def count(self):
-        pass
+        """
+        Number of objects matching the query. The server only counts, no object is transferred.
+        :return: int
+        """
+        return self._find(self._count_query().build())['count']
+
+    def _count_query(self):
+        return self.limit(0)._set('count', 1)._unset('skip')._set('order', [])
 
     def fetch(self):
+        return self._query_set(self._find(self.build()))
+
+    def fetch_with_count(self):
+        """
+        Fetch one page of the query together with the total number of matching objects in a
+        single request. The total is available as the count attribute of the returned QuerySet.
+        :return: QuerySet
+        """
+        response = self._find(self._set('count', 1).build())
+        query_set = self._query_set(response)
+        query_set.count = response['count']
+
+        return query_set
+
+    def _find(self, params, cached=True):
         options = {
             'route': 'classes',
             'className': self.className,
             'method': 'GET',
-            'params': self.build()
+            'params': params
         }
 
-        response = Parse.Initialization.request(**options)
+        if not cached:
+            return self._get_client().request(**options)
+
+        return self._request(Cache.key(self.className, params), options)
+
+    def _request(self, key, options):
+        """
+        Send a read request, through the cache of the Parse instance if it has one. Responses
+        depend on the acl of the user, so they are only shared by requests with the same
+        credentials.
+        """
+        parse = self._get_client()
+
+        if parse.cache is None:
+            return parse.request(**options)
+
+        key = key + parse._effective_credentials(**options)
 
+        return parse.cache.fetch(key, [self.className], lambda: parse.request(**options),
+                                 include='include' in self.params)
+
+    def _query_set(self, response):
         # not calling it loaded if keys were specified
         is_loaded = 'keys' not in self.params or self.params['keys'] == 1
 
-        return QuerySet(results=response['results'], className=self.className, is_loaded=is_loaded)
+        return QuerySet(results=response['results'], className=self.className, is_loaded=is_loaded,
+                        client=self._client, asynchronous=self._asynchronous)
+
+    def iterate(self, page_size=100, cursor='objectId', prefetch=0):
+        """
+        Generator over every object matching the query. Rather than using skip, which gets slower
+        the further it goes, pages are requested with a keyset cursor: objects are ordered by the
+        cursor and each page starts after the last object of the previous page. Only one page is
+        held in memory at a time. A limit on the query caps the total number of objects.
+        :param page_size: number of objects requested per page
+        :param cursor: 'objectId' or 'createdAt', the attribute to order and page by
+        :param prefetch: number of pages requested ahead in a background thread while the current
+                         page is processed, 0 requests each page only when it is needed
+        :return: generator of ParseObjects
+        """
+        pages = self._pages(page_size, cursor)
+
+        if prefetch > 0:
+            pages = Query._prefetch(pages, prefetch)
+
+        for page in pages:
+            for item in page:
+                yield item
+
+    def iterate_columns(self, fields, page_size=1000, cursor='objectId', prefetch=0):
+        """
+        Streaming counterpart of QuerySet.to_columns, pages are requested as in iterate and each
+        one is yielded as columns. Unless the query already restricts its keys, only the exported
+        fields are requested.
+        :param fields: names of the attributes to export
+        :param page_size: number of objects requested per page
+        :param cursor: 'objectId' or 'createdAt', the attribute to order and page by
+        :param prefetch: number of pages requested ahead in a background thread
+        :return: generator of OrderedDicts of column name to array, one per page
+        """
+        query = self if 'keys' in self.params else self.keys(list(fields))
+        pages = query._pages(page_size, cursor)
+
+        if prefetch > 0:
+            pages = Query._prefetch(pages, prefetch)
+
+        for page in pages:
+            yield page.to_columns(fields)
+
+    @staticmethod
+    def _prefetch(pages, depth):
+        """
+        Consumes the pages generator in a background thread. At most depth pages wait in the
+        buffer, plus the one the thread is holding, so memory stays bounded whatever the consumer
+        speed. The thread stops as soon as the consumer is done or goes away. Pages are requested
+        with the credentials and client of the context iterating.
+        """
+        buffer = queue.Queue(maxsize=depth)
+        stopped = threading.Event()
+
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for page in pages:
+                    if not put((page, None)):
+                        return
+            except Exception as e:
+                put((None, e))
+            else:
+                put((None, None))
+
+        if copy_context is not None:
+            thread = threading.Thread(target=copy_context().run, args=(produce,))
+        else:
+            thread = threading.Thread(target=produce)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            while True:
+                page, error = buffer.get()
+
+                if error is not None:
+                    raise error
+
+                if page is None:
+                    return
+
+                yield page
+        finally:
+            stopped.set()
+
+    def _pages(self, page_size, cursor):
+        self._check_cursor(cursor)
+
+        remaining = self.params.get('limit', None)
+        last = None
+
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = self._page_query(size, cursor, last).fetch()
+
+            if len(page) > 0:
+                yield page
+
+            if len(page) < size or self._pins_cursor(cursor):
+                return
+
+            last = page.results[-1]
+
+            if remaining is not None:
+                remaining -= len(page)
+
+    def _check_cursor(self, cursor):
+        if cursor not in ['objectId', 'createdAt']:
+            raise ParseResourceException('cannot page by %s' % cursor)
+
+        if len(self.params['order']) > 0 or 'skip' in self.params:
+            raise ParseResourceException('iterate cannot be combined with order or skip')
+
+        if cursor == 'createdAt' and '$or' in self.params['where']:
+            raise ParseResourceException('iterate by createdAt cannot be combined with $or')
+
+    def _pins_cursor(self, cursor):
+        """
+        Whether the where clause requires the objectId cursor to equal a value, in which case at
+        most one object matches and there is no page after the first.
+        """
+        where = self.params['where']
+        return cursor == 'objectId' and 'objectId' in where and \
+            not isinstance(where['objectId'], dict)
+
+    def _page_query(self, size, cursor, last):
+        """
+        Query for the page following the row last, ordered by cursor.
+        """
+        q = self.limit(size)
+
+        if cursor == 'objectId':
+            q = q.ascending('objectId')
+
+            if last is not None:
+                # rows already satisfy any bound on objectId so the cursor replaces it
+                q = q.greater_than('objectId', last['objectId'])
+        else:
+            q = q.ascending('createdAt').ascending('objectId')
+
+            if last is not None:
+                createdAt = {'__type': 'Date', 'iso': last['createdAt']}
+                q = q._where('$or', None, [
+                    {'createdAt': {'$gt': createdAt}},
+                    {'createdAt': createdAt, 'objectId': {'$gt': last['objectId']}}
+                ])
+
+        return q
 
     def get(self, objectId):
+        item = self._kept(objectId)
+
+        if item is not None:
+            return item
+
+        options = self._get_options(objectId)
+        response = self._request((self.className, objectId, options.get('params', None)), options)
+
+        cls = ComplexTypeMeta.get_class(self.className, self._asynchronous)
+        return self._bound(cls.hydrate(response, is_loaded=True))
+
+    def _bound(self, item):
+        if self._client is not None:
+            item.bind(self._client)
+        return item
+
+    def _kept(self, objectId):
+        """
+        Loaded object kept by the current IdentityMap, which get returns without a request.
+        """
+        identity_map = IdentityMap.current()
+
+        if identity_map is not None and 'include' not in self.params:
+            item = identity_map.get(self.className, objectId, self._asynchronous)
+
+            if item is not None and item._is_loaded:
+                return item
+
+        return None
+
+    def _get_options(self, objectId):
         options = {
             'route': 'classes',
             'className': self.className,
@@ -90,158 +463,300 @@ class Query(object):
             'method': 'GET'
         }
 
-        response = Parse.Initialization.request(**options)
-
-        cls = ComplexTypeMeta.register.get(self.className, None)
-
-        if cls is None:
-            raise ParseClassDoesNotExist('%s does not exist' % self.className)
+        if 'include' in self.params:
+            options['params'] = urlencode({'include': ','.join(self.params['include'])})
 
-        item = type(self.className, (cls,), {})()
-        ParseObject.convert_from_parse_to_native(response, item=item, is_loaded=True)
-
-        return item
+        return options
 
     def include(self, attribute):
-        q = deepcopy(self)
-        return q
+        """
+        Have the server embed the objects referenced by the pointer attribute in the results, they
+        are returned as loaded ParseObjects instead of Pointers. Nested pointers are included with
+        a dotted path such as 'city.country'.
+        :param attribute: attribute name or dotted path
+        :return: Query
+        """
+        return self._append('include', attribute)
 
     def keys(self, keys):
-        q = deepcopy(self)
-        q.params['keys'] = keys
-        return q
+        return self._set('keys', keys)
 
     def first(self):
-        q = deepcopy(self)
-        q.skip(0)
-        q.limit(1)
-        return q
+        return self.skip(0).limit(1)
 
     def limit(self, n):
-        q = deepcopy(self)
-        q.params['limit'] = n
-        return q
+        return self._set('limit', n)
 
     def skip(self, n):
-        q = deepcopy(self)
-        q.params['skip'] = n
-        return q
+        return self._set('skip', n)
 
     def ascending(self, attribute):
-        q = deepcopy(self)
-        q.params['order'].append(attribute)
-        return q
+        return self._append('order', attribute)
 
     def descending(self, attribute):
-        q = deepcopy(self)
-        q.params['order'].append('-' + attribute)
-        return q
+        return self._append('order', '-' + attribute)
 
     # filters
 
     def equal_to(self, attribute, value):
-        q = deepcopy(self)
-        if attribute in q.params['where']:
+        if attribute in self._where_keys:
             raise Exception
 
-        if isinstance(value, ParseObject):
+        if isinstance(value, BaseParseObject):
             value = value.to_pointer()
 
-        q.params['where'][attribute] = value
-        return q
+        return self._where(attribute, None, value)
 
     def not_equal_to(self, attribute, value):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-
-        if isinstance(value, ParseObject):
+        if isinstance(value, BaseParseObject):
             value = value.to_pointer()
 
-        q.params['where'][attribute]['$ne'] = value
-        return q
+        return self._where(attribute, '$ne', value)
 
     def greater_than(self, attribute, value):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$gt'] = value
-        return q
+        return self._where(attribute, '$gt', value)
 
     def greater_than_or_equal(self, attribute, value):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$gte'] = value
-        return q
+        return self._where(attribute, '$gte', value)
 
     def less_than(self, attribute, value):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$lt'] = value
-        return q
+        return self._where(attribute, '$lt', value)
 
     def less_than_or_equal(self, attribute, value):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$lte'] = value
-
-        return q
+        return self._where(attribute, '$lte', value)
 
     def contained_in(self, attribute, values):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$in'] = values
-        return q
+        return self._where(attribute, '$in', values)
 
     def not_contained_in(self, attribute, values):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$nin'] = values
-        return q
+        return self._where(attribute, '$nin', values)
 
     def exists(self, attribute):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$exists'] = True
-        return q
+        return self._where(attribute, '$exists', True)
 
     def does_not_exist(self, attribute):
-        q = deepcopy(self)
-        if attribute not in q.params['where']:
-            q.params['where'][attribute] = {}
-        q.params['where'][attribute]['$exists'] = False
-        return q
+        return self._where(attribute, '$exists', False)
 
 
-class QuerySet(object):
+class QueryTemplate(object):
+    """
+    Query compiled into the encoded parameters with a gap for every Param placeholder. Binding
+    values only encodes the values themselves. Templates are immutable and hashable.
+    """
+
+    # templates kept by QueryTemplate.get, the oldest is dropped when full
+    max_cached = 256
+    cache = OrderedDict()
+    lock = threading.Lock()
+
+    def __init__(self, query, encoded):
+        self.query = query
+        self.className = query.className
 
-    def __init__(self, results, className, is_loaded=True):
+        markers = dict((quote_plus(json.dumps(param.marker)), param.name)
+                       for param in QueryTemplate._params(query.params['where']))
+
+        if len(markers) == 0:
+            self.names = ()
+            self.segments = (encoded,)
+        else:
+            pattern = re.compile('|'.join(re.escape(marker) for marker in markers))
+            self.names = tuple(markers[marker] for marker in pattern.findall(encoded))
+            self.segments = tuple(pattern.split(encoded))
+
+        self._count_template = None
+
+    @staticmethod
+    def _params(value):
+        if isinstance(value, Param):
+            yield value
+        elif isinstance(value, dict):
+            for v in value.values():
+                for param in QueryTemplate._params(v):
+                    yield param
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                for param in QueryTemplate._params(v):
+                    yield param
+
+    @staticmethod
+    def get(query):
+        """
+        Template of query, taken from the cache when an equal query was compiled before.
+        """
+        encoded = query.build()
+        # the template sends its requests with query, which only equal queries of the same kind
+        # and client can share
+        key = (query.__class__, query._client, query.className, encoded)
+
+        with QueryTemplate.lock:
+            template = QueryTemplate.cache.get(key, None)
+
+            if template is None:
+                template = QueryTemplate(query, encoded)
+                QueryTemplate.cache[key] = template
+
+                while len(QueryTemplate.cache) > QueryTemplate.max_cached:
+                    QueryTemplate.cache.popitem(last=False)
+
+        return template
+
+    def __eq__(self, other):
+        return isinstance(other, QueryTemplate) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        # the names decide the keywords bind takes, templates differing only by them are not equal
+        return self.className, self.segments, self.names
+
+    def bind(self, **values):
+        """
+        Encoded query parameters with the placeholders replaced by values.
+        :return: str
+        """
+        parts = [self.segments[0]]
+
+        for name, segment in zip(self.names, self.segments[1:]):
+            if name not in values:
+                raise ParseResourceException('no value bound to %s' % name)
+
+            parts.append(quote_plus(json.dumps(values[name], cls=ParseObjectEncoder)))
+            parts.append(segment)
+
+        return ''.join(parts)
+
+    def fetch(self, **values):
+        return self.query._query_set(self.query._find(self.bind(**values)))
+
+    def count(self, **values):
+        if self._count_template is None:
+            self._count_template = self.query._count_query().compile()
+
+        return self._count_template.query._find(self._count_template.bind(**values))['count']
+
+
+class QuerySet(object):
+    """
+    Results of a query. Rows are kept as sent by parse and each one is turned into an object
+    the first time it is accessed, the object is then cached so that iterating or indexing again
+    returns the same instance. Slices share the rows and the cache of the QuerySet they come
+    from, so slicing does not decode anything either.
+    """
+
+    def __init__(self, results, className, is_loaded=True, count=None, client=None,
+                 asynchronous=False):
         self.results = results
         self.className = className
         self.is_loaded = is_loaded
+        self.count = count
+        # objects are bound to client when it is set
+        self.client = client
+        # rows are hydrated into classes of the asyncio client if there are
+        self.asynchronous = asynchronous
+        self._rows = results
+        self._items = [None] * len(results)
+        # positions in _rows of the results, None when results is _rows itself
+        self._indices = None
+        self._hydrate = None
 
     def __len__(self):
         return len(self.results)
 
     def __getitem__(self, i):
-        return self.results[i]
+        indices = self._positions()
+
+        if isinstance(i, slice):
+            query_set = QuerySet.__new__(QuerySet)
+            query_set.__dict__.update(self.__dict__)
+            query_set._indices = indices[i]
+            query_set.results = [self._rows[j] for j in query_set._indices]
+            query_set.count = None
+            return query_set
+
+        return self._item(indices[i])
 
     def __iter__(self):
-        for row in self.results:
-            cls = ComplexTypeMeta.register.get(self.className, None)
+        for j in self._positions():
+            yield self._item(j)
+
+    def _positions(self):
+        if self._indices is None:
+            # a range indexes and slices in constant time without building a list
+            return range(len(self._rows))
+        return self._indices
+
+    def _item(self, j):
+        item = self._items[j]
 
-            if cls is None:
-                raise ParseClassDoesNotExist(
-                    '%s does not exist' % self.className)
+        if item is None:
+            if self._hydrate is None:
+                # the class is looked up once, each row is then a direct call to hydrate
+                self._hydrate = ComplexTypeMeta.get_class(self.className, self.asynchronous).hydrate
+            item = self._items[j] = self._hydrate(self._rows[j], is_loaded=self.is_loaded)
 
-            item = type(self.className, (cls,), {})()
-            ParseObject.convert_from_parse_to_native(row, item=item, is_loaded=self.is_loaded)
+            if self.client is not None:
+                item.bind(self.client)
 
-            yield item
+        return item
+
+    def resolve(self, attribute):
+        """
+        Replace the pointers stored in attribute, across all results, with loaded objects. The
+        pointers are grouped by class and each group is loaded with a single $in query on
+        objectId, instead of loading every pointer on its own.
+        :param attribute: attribute name
+        :return: self
+        """
+        pointers = {}
 
+        for row in self.results:
+            pointer = row.get(attribute, None)
+            if isinstance(pointer, dict) and pointer.get('__type', None) == 'Pointer':
+                pointers.setdefault(pointer['className'], set()).add(pointer['objectId'])
+
+        loaded = {}
+
+        for className, objectIds in pointers.items():
+            objectIds = list(objectIds)
+
+            for start in range(0, len(objectIds), ParseObject.max_fetch_size):
+                chunk = objectIds[start:start + ParseObject.max_fetch_size]
+                query = Query(className, client=self.client)
+                query = query.contained_in('objectId', chunk).limit(len(chunk))
+
+                for row in query.fetch().results:
+                    row = dict(row, __type='Object', className=className)
+                    loaded[(className, row['objectId'])] = row
+
+        for j in self._positions():
+            row = self._rows[j]
+            pointer = row.get(attribute, None)
+            if isinstance(pointer, dict) and pointer.get('__type', None) == 'Pointer':
+                row[attribute] = loaded.get((pointer['className'], pointer['objectId']), pointer)
+
+                # objects already handed out get the loaded object too, unless changed locally
+                item = self._items[j]
+                if item is not None and attribute not in item._dirty_keys:
+                    ParseObject.convert_from_parse_to_native({attribute: row[attribute]},
+                                                             item=item, is_loaded=item._is_loaded)
+
+                    if self.client is not None:
+                        item.bind(self.client)
+
+        return self
+
+    def to_columns(self, fields):
+        """
+        Export fields of the results as typed arrays, see pyparsecom.columns.to_columns. The rows
+        are read as returned by parse, no object is created per row. If the class declares a
+        schema it decides the array types, otherwise they are inferred from the values.
+        :param fields: names of the attributes to export
+        :return: OrderedDict of column name to array
+        """
+        cls = ComplexTypeMeta.register.get(self.className, None)
+        return columns.to_columns(self.results, fields, getattr(cls, 'schema', None))
@@ -0,0 +1,224 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import random
+import threading
+import time
+from requests.exceptions import ConnectionError, ConnectTimeout
+from urllib3.exceptions import NewConnectionError
+from .throttle import error_code, retry_after, REQUEST_LIMIT_EXCEEDED
+
+# parse error codes of transient failures
+INTERNAL_SERVER_ERROR = 1
+CONNECTION_FAILED = 100
+TIMEOUT = 124
+
+
+class RetryBudget(object):
+    """
+    Bounds retries to a share of the requests so that an outage does not multiply the load on the
+    server. Every request deposits ratio tokens and every retry withdraws one, the balance starts
+    full and never exceeds capacity.
+    """
+
+    def __init__(self, ratio=0.2, capacity=10):
+        """
+        :param ratio: retries allowed per request once the initial balance is spent
+        :param capacity: largest balance, the retries allowed in a burst
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self.balance = float(capacity)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def withdraw(self):
+        """
+        :return: True when a retry is allowed
+        """
+        with self._lock:
+            if self.balance < 1:
+                return False
+
+            self.balance -= 1
+            return True
+
+
+class RetryStats(object):
+    """
+    Counters of a RetryPolicy: requests sent, retries and their reasons, requests that
+    succeeded after retrying and requests that failed although retryable, because they ran out
+    of attempts or of budget.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.recovered = 0
+            self.exhausted = 0
+            self.over_budget = 0
+            self.reasons = {}
+
+    def count(self, name, reason=None):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+            if reason is not None:
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def as_dict(self):
+        with self._lock:
+            return {'requests': self.requests, 'retries': self.retries,
+                    'recovered': self.recovered, 'exhausted': self.exhausted,
+                    'over_budget': self.over_budget, 'reasons': dict(self.reasons)}
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed attempt is sent again and how long to wait before it. Waits grow
+    exponentially from base up to cap with full jitter, or as long as a Retry-After header asks.
+
+    Idempotent methods are retried on transport errors, on the statuses in retry_statuses and on
+    the parse error codes in retry_codes. Other methods, POST creating objects or sending a batch,
+    could be applied twice, so they are only retried when the server certainly did not process
+    them: throttled responses and connections that could not be opened.
+    """
+    idempotent_methods = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    def __init__(self, max_attempts=5, base=0.1, cap=10.0, jitter=True,
+                 retry_statuses=(429, 500, 502, 503, 504),
+                 retry_codes=(INTERNAL_SERVER_ERROR, CONNECTION_FAILED, TIMEOUT,
+                              REQUEST_LIMIT_EXCEEDED),
+                 budget=None, sleep=time.sleep, random=random.random):
+        """
+        :param max_attempts: attempts of a request including the first one, 1 disables retries
+        :param base: seconds to wait before the first retry, doubled for every further retry
+        :param cap: longest wait in seconds
+        :param jitter: wait a random time up to the backoff instead of the backoff itself, which
+                       spreads the retries of concurrent clients
+        :param retry_statuses: http statuses retried for idempotent methods
+        :param retry_codes: parse error codes retried for idempotent methods
+        :param budget: RetryBudget shared by the requests of the policy, defaults to a new one
+        :param sleep: function waiting between attempts of blocking requests
+        :param random: function returning a float in [0, 1), used for jitter
+        """
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_codes = frozenset(retry_codes)
+        self.budget = budget if budget is not None else RetryBudget()
+        self.sleep = sleep
+        self.random = random
+        self.stats = RetryStats()
+
+    def backoff(self, attempt):
+        """
+        Seconds to wait after a failed attempt, attempts are counted from 1.
+        """
+        delay = min(self.cap, self.base * 2 ** (attempt - 1))
+        return delay * self.random() if self.jitter else delay
+
+    def reason(self, method, response=None, error=None):
+        """
+        Why the outcome of an attempt is worth retrying, None when it is not.
+        """
+        idempotent = method.upper() in self.idempotent_methods
+
+        if error is not None:
+            if idempotent or self.is_unsent(error):
+                return error.__class__.__name__
+            return None
+
+        if response.status_code == 429:
+            return 'status 429'
+
+        code = error_code(response)
+
+        if code == REQUEST_LIMIT_EXCEEDED:
+            return 'code %d' % code
+
+        if not idempotent:
+            return None
+
+        if response.status_code in self.retry_statuses:
+            return 'status %d' % response.status_code
+
+        if code in self.retry_codes:
+            return 'code %d' % code
+
+        return None
+
+    @staticmethod
+    def is_unsent(error):
+        """
+        True for transport errors raised before the request reached the server.
+        """
+        if isinstance(error, ConnectTimeout):
+            return True
+
+        if isinstance(error, ConnectionError) and error.args:
+            return isinstance(getattr(error.args[0], 'reason', None), NewConnectionError)
+
+        return False
+
+    def delay(self, method, attempt, response=None, error=None):
+        """
+        Called after every attempt with either its response or the error raised by the transport.
+        :param method: http method of the request
+        :param attempt: number of the attempt, from 1
+        :return: seconds to wait before the next attempt, None to stop and handle the outcome
+        """
+        if attempt == 1:
+            self.stats.count('requests')
+            self.budget.deposit()
+
+        reason = self.reason(method, response, error)
+
+        if reason is None:
+            if attempt > 1 and error is None and response.status_code < 400:
+                self.stats.count('recovered')
+            return None
+
+        if attempt >= self.max_attempts:
+            self.stats.count('exhausted')
+            return None
+
+        if not self.budget.withdraw():
+            self.stats.count('over_budget')
+            return None
+
+        self.stats.count('retries', reason)
+        delay = self.backoff(attempt)
+
+        if response is not None:
+            delay = max(delay, retry_after(response))
+
+        return delay
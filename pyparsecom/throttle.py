@@ -0,0 +1,263 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Client side throttling. A TokenBucket keeps the request rate under the quota of the application,
+an AdaptiveLimiter bounds the requests in flight and shrinks the bound when the server throttles.
+ThrottledTransport applies both to the requests of another transport:
+
+    bucket = TokenBucket(30, shared=True)
+    Parse.initialize(application_id, rest_api_key,
+                     transport=ThrottledTransport(SessionTransport(), bucket, AdaptiveLimiter()))
+
+A shared bucket lives in shared memory, create it before starting the worker processes and hand
+it to them (as an argument of Process or of the initializer of a Pool) so that all of them draw
+from the same quota.
+"""
+
+import multiprocessing
+import threading
+import time
+from .transport import Transport
+
+# parse error code of responses refused because the application exceeded its request limit
+REQUEST_LIMIT_EXCEEDED = 155
+
+
+class TokenBucket(object):
+    """
+    Token bucket refilled at a constant rate. Every request takes a token and waits for one when
+    the bucket is empty, bursts are bounded by the capacity of the bucket.
+    """
+
+    def __init__(self, rate, capacity=None, shared=False, clock=time.time, sleep=time.sleep):
+        """
+        :param rate: tokens added per second, the sustained requests per second
+        :param capacity: maximum number of tokens, the largest burst, defaults to rate
+        :param shared: keep the state in shared memory so that processes share the bucket
+        :param clock: current time in seconds, must agree between processes when shared
+        :param sleep: function used to wait for tokens
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.clock = clock
+        self.sleep = sleep
+
+        # tokens and time of the last update
+        if shared:
+            self._state = multiprocessing.Array('d', [self.capacity, clock()])
+            self._lock = self._state.get_lock()
+        else:
+            self._state = [self.capacity, clock()]
+            self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        with self._lock:
+            return min(self.capacity, self._state[0] + (self.clock() - self._state[1]) * self.rate)
+
+    def _take(self, tokens):
+        """
+        Take tokens when the bucket holds enough of them.
+        :return: 0 when the tokens were taken, otherwise the seconds until they are available
+        """
+        with self._lock:
+            now = self.clock()
+            available = min(self.capacity, self._state[0] + (now - self._state[1]) * self.rate)
+            self._state[1] = now
+
+            # a deficit left over by rounding after sleeping would otherwise never be refilled
+            if tokens - available < 1e-9:
+                self._state[0] = max(0.0, available - tokens)
+                return 0
+
+            self._state[0] = available
+            return (tokens - available) / self.rate
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens without waiting.
+        :return: True when the tokens were taken
+        """
+        return self._take(tokens) == 0
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens, waiting until the bucket holds enough of them.
+        """
+        while True:
+            delay = self._take(tokens)
+
+            if delay == 0:
+                return
+
+            self.sleep(delay)
+
+    def drain(self, seconds=0):
+        """
+        Empty the bucket, used when the server throttles anyway. With seconds, requests also wait
+        that long before the bucket refills, as asked by a Retry-After header.
+        """
+        with self._lock:
+            self._state[0] = -seconds * self.rate
+            self._state[1] = self.clock()
+
+
+class AdaptiveLimiter(object):
+    """
+    Bound on the number of requests in flight that adapts to the server: it grows by about one
+    for every limit requests that succeed and is cut by backoff when a request is throttled
+    (additive increase, multiplicative decrease). Throttled responses to requests started before
+    the latest cut do not cut it again, so a burst of them only counts once.
+    """
+
+    def __init__(self, initial=10, minimum=1, maximum=100, backoff=0.5):
+        """
+        :param initial: requests allowed in flight at first
+        :param minimum: lowest bound
+        :param maximum: highest bound
+        :param backoff: factor applied to the bound when a request is throttled
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.in_flight = 0
+
+        # incremented on every cut, requests remember the generation they started in
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Wait for a free slot.
+        :return: ticket to hand to release
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+
+            self.in_flight += 1
+            return self._generation
+
+    def try_acquire(self):
+        """
+        Take a free slot without waiting.
+        :return: ticket to hand to release, None when no slot is free
+        """
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return None
+
+            self.in_flight += 1
+            return self._generation
+
+    def release(self, ticket, throttled=False):
+        """
+        Free the slot of a request and adapt the bound to its outcome.
+        :param ticket: value returned by acquire
+        :param throttled: True when the server throttled the request, False when it succeeded,
+                          None when the outcome says nothing about the load (connection errors)
+        """
+        with self._condition:
+            self.in_flight -= 1
+
+            if throttled:
+                if ticket == self._generation:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._generation += 1
+            elif throttled is not None:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+            self._condition.notify_all()
+
+
+def error_code(response):
+    """
+    Parse error code of an error response, None for other responses.
+    """
+    if response.status_code < 400:
+        return None
+
+    try:
+        return response.json().get('code')
+    except Exception:
+        return None
+
+
+def is_throttled(response):
+    """
+    True for responses refused because of the request limit of the application.
+    """
+    return response.status_code == 429 or error_code(response) == REQUEST_LIMIT_EXCEEDED
+
+
+def retry_after(response):
+    """
+    Seconds to wait asked by the Retry-After header of a response, 0 without one.
+    """
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', 0)))
+    except (TypeError, ValueError):
+        # http dates are not worth parsing here
+        return 0.0
+
+
+class ThrottledTransport(Transport):
+    """
+    Wraps a transport so that its requests are rate limited by a TokenBucket and bounded by an
+    AdaptiveLimiter, both optional. Throttled responses drain the bucket, for as long as their
+    Retry-After header asks, and cut the concurrency of the limiter. They are still returned, so
+    they surface as ParseError like any other error response. The asyncio client applies the
+    same bucket and limiter to its requests, see pyparsecom.aio.AsyncThrottledTransport.
+    """
+
+    def __init__(self, transport, bucket=None, limiter=None):
+        """
+        :param transport: Transport sending the requests
+        :param bucket: TokenBucket every request takes a token from
+        :param limiter: AdaptiveLimiter bounding the requests in flight
+        """
+        self.transport = transport
+        self.bucket = bucket
+        self.limiter = limiter
+
+    def send(self, method, url, data=None, headers=None):
+        ticket = self.limiter.acquire() if self.limiter is not None else None
+        throttled = None
+
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire()
+
+            response = self.transport.send(method, url, data=data, headers=headers)
+            throttled = is_throttled(response)
+
+            if throttled and self.bucket is not None:
+                self.bucket.drain(retry_after(response))
+
+            return response
+        finally:
+            if self.limiter is not None:
+                self.limiter.release(ticket, throttled)
+
+    def close(self):
+        self.transport.close()
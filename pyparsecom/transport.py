@@ -0,0 +1,104 @@
+# Copyright (c) 2015 Justin Poehnelt
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files
+# (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+class Transport(object):
+    """
+    Base class for the HTTP layer owned by a Parse instance. A transport receives a fully built
+    request and returns a response exposing ``status_code``, ``headers`` and ``json()``.
+    """
+
+    def send(self, method, url, data=None, headers=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SessionTransport(Transport):
+    """
+    Transport backed by a requests Session. Connections are kept alive and reused from a pool
+    instead of opening a new TCP+TLS connection for every call.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 connect_timeout=10, read_timeout=30):
+        """
+        :param pool_connections: number of hosts to keep connection pools for
+        :param pool_maxsize: maximum number of connections kept alive per host
+        :param pool_block: block when the pool of a host is exhausted instead of opening
+                           throwaway connections
+        :param connect_timeout: seconds to wait for a connection to the server
+        :param read_timeout: seconds to wait for the server to send a response
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+
+        self.session = Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @property
+    def timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+    def send(self, method, url, data=None, headers=None):
+        return self.session.request(method=method, url=url, data=data, headers=headers,
+                                    timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class LocalResponse(object):
+    """
+    Minimal stand-in for a requests Response returned by LocalTransport.
+    """
+
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(body)
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class LocalTransport(Transport):
+    """
+    Transport that hands requests to a python callable instead of the network, mostly useful for
+    tests. The handler is called with ``(method, url, data, headers)`` and returns
+    ``(status_code, body)`` or ``(status_code, body, headers)``. The body is serialized to json
+    and back so that no state is shared between the handler and the caller.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def send(self, method, url, data=None, headers=None):
+        return LocalResponse(*self.handler(method.upper(), url, data, headers or {}))
@@ -23,7 +23,6 @@ import datetime
 import six
 import base64
 from .objects import ParseType, ComplexTypeMeta
-from .exceptions import ParseClassDoesNotExist
 
 
 class GeoPoint(ParseType):
@@ -51,12 +50,8 @@ class Pointer(ParseType):
         }
 
     def load(self):
-        cls = ComplexTypeMeta.register.get(self.className, None)
-
-        if cls is None:
-            raise ParseClassDoesNotExist('%s does not exist' % self.className)
-
-        return type(self.className, (cls,), {})(**self.__dict__)
+        cls = ComplexTypeMeta.get_class(self.className)
+        return cls.hydrate({'objectId': self.objectId}, is_loaded=False)
 
 
 class Date(ParseType):
@@ -65,6 +60,17 @@ class Date(ParseType):
     @staticmethod
     def from_str(date_str):
         """turn a ISO 8601 string into a datetime object"""
+        # parse always sends dates as 2015-09-01T12:30:45.123Z, slice those directly
+        if len(date_str) == 24 and date_str[10] == 'T' and date_str[19] == '.' and \
+                date_str[23] == 'Z':
+            try:
+                return datetime.datetime(int(date_str[0:4]), int(date_str[5:7]),
+                                         int(date_str[8:10]), int(date_str[11:13]),
+                                         int(date_str[14:16]), int(date_str[17:19]),
+                                         int(date_str[20:23]) * 1000)
+            except ValueError:
+                pass
+
         return datetime.datetime.strptime(date_str[:-1] + 'UTC', Date.FORMAT)
 
     def __init__(self, date):
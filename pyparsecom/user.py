@@ -20,7 +20,7 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from six.moves.urllib.parse import urlencode
-from .core import SessionToken, Parse
+from .core import Parse
 from .objects import ParseObject
 
 
@@ -30,75 +30,84 @@ class User(ParseObject):
     PROTECTED_ATTRIBUTES = ParseObject.PROTECTED_ATTRIBUTES + ['username', 'sessionToken',
                                                                'emailVerified']
     @staticmethod
-    def become(session_token):
-        with SessionToken(session_token):
-            options = {
-                'route': 'users',
-                'objectId': 'me',
-                'method': 'GET'
-            }
+    def become(session_token, client=None):
+        parse = client if client is not None else Parse.current()
+        response = parse.request(**User._become_options(session_token))
 
-            response = Parse.Initialization.request(**options)
-
-        user = User()
+        user = User().bind(client)
         ParseObject.convert_from_parse_to_native(response, item=user)
 
         return user
 
     @staticmethod
-    def login(username, password):
-        options = {
-            'route': 'login',
+    def _become_options(session_token):
+        return {
+            'route': 'users',
+            'objectId': 'me',
             'method': 'GET',
-            'params': urlencode({'username': username, 'password': password})
+            'session_token': session_token
         }
 
-        response = Parse.Initialization.request(**options)
+    @staticmethod
+    def login(username, password, client=None):
+        parse = client if client is not None else Parse.current()
+        response = parse.request(**User._login_options(username, password))
 
-        user = User()
+        user = User().bind(client)
         ParseObject.convert_from_parse_to_native(response, item=user, is_loaded=True)
 
         return user
 
     @staticmethod
-    def signup(username, password):
-        options = {
-            'route': 'users',
-            'method': 'POST',
-            'data': {'username': username, 'password': password}
+    def _login_options(username, password):
+        return {
+            'route': 'login',
+            'method': 'GET',
+            'params': urlencode({'username': username, 'password': password})
         }
 
-        response = Parse.Initialization.request(**options)
+    @staticmethod
+    def signup(username, password, client=None):
+        parse = client if client is not None else Parse.current()
+        response = parse.request(**User._signup_options(username, password))
 
-        user = User()
+        user = User().bind(client)
         ParseObject.convert_from_parse_to_native(response, item=user, is_loaded=True)
 
         return user
 
+    @staticmethod
+    def _signup_options(username, password):
+        return {
+            'route': 'users',
+            'method': 'POST',
+            'data': {'username': username, 'password': password}
+        }
+
     def save(self):
-        with SessionToken(self.sessionToken):
-            options = {
-                'route': 'users',
-                'objectId': self.objectId,
-                'method': 'PUT',
-                'data': dict((k, v) for k, v in self._convert_from_native_to_parse().items() if
-                             k in self._dirty_keys)
-            }
-
-            response = Parse.Initialization.request(**options)
-
-        ParseObject.convert_from_parse_to_native(response, item=self, is_loaded=True)
-        self._dirty_keys.clear()
-
-    def delete(self):
-        with SessionToken(self.sessionToken):
-            options = {
-                'route': 'users',
-                'objectId': self.objectId,
-                'method': 'DELETE'
-            }
-
-            response = Parse.Initialization.request(**options)
+        dirty_keys = list(self._dirty_keys)
+        response = self._get_client().request(**self._save_options())
+        self._apply_save(response, dirty_keys)
+
+    def _save_options(self):
+        # the session token goes with the request instead of being set on the Parse instance, so
+        # users can be saved from many threads at once
+        return {
+            'route': 'users',
+            'objectId': self.objectId,
+            'method': 'PUT',
+            'data': dict((k, v) for k, v in self.convert_from_native_to_parse().items() if
+                         k in self._dirty_keys),
+            'session_token': self.sessionToken
+        }
+
+    def _delete_options(self):
+        return {
+            'route': 'users',
+            'objectId': self.objectId,
+            'method': 'DELETE',
+            'session_token': self.sessionToken
+        }
 
     @property
     def className(self):
@@ -15,7 +15,8 @@ with open('HISTORY.rst') as history_file:
     history = history_file.read().replace('.. :changelog:', '')
 
 requirements = [
-    'requests'
+    'requests',
+    'futures; python_version < "3.2"'
 ]
 
 test_requirements = [
@@ -37,6 +38,10 @@ setup(
                  'pyparsecom'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'columns': ['numpy'],
+        'async': ['aiohttp']
+    },
     license="MIT",
     zip_safe=False,
     keywords='pyparsecom',
@@ -2,7 +2,20 @@
 # -*- coding: utf-8 -*-
 import os
 from pyparsecom.core import Parse
+from pyparsecom.transport import SessionTransport, LocalTransport
+from tests.server import FakeParseServer
 
 
 def init_parse():
-    Parse.initialize(os.environ.get('PARSE_APPLICATION_ID'), os.environ.get('PARSE_REST_KEY'))
\ No newline at end of file
+    Parse.initialize(os.environ.get('PARSE_APPLICATION_ID'), os.environ.get('PARSE_REST_KEY'),
+                     transport=SessionTransport(), cache=None, async_transport=None)
+
+
+def init_local_parse():
+    """
+    Initialize Parse against an in-memory FakeParseServer and return the server.
+    """
+    server = FakeParseServer(Parse.server_url)
+    Parse.initialize('application-id', 'rest-key', transport=LocalTransport(server),
+                     cache=None, async_transport=None)
+    return server
\ No newline at end of file
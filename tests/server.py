@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import copy
+import datetime
+import hashlib
+import json
+import uuid
+from six.moves.urllib.parse import urlparse, parse_qsl
+
+
+def now():
+    return '{0}Z'.format(datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3])
+
+
+def comparable(value):
+    if isinstance(value, dict) and value.get('__type') == 'Date':
+        return value['iso']
+    if isinstance(value, dict) and value.get('__type') == 'Pointer':
+        return value['className'], value['objectId']
+    return value
+
+
+def matches(row, where):
+    for key, constraint in where.items():
+        if key == '$or':
+            if not any(matches(row, clause) for clause in constraint):
+                return False
+            continue
+
+        value = comparable(row.get(key))
+
+        if not isinstance(constraint, dict) or '__type' in constraint:
+            if value != comparable(constraint):
+                return False
+            continue
+
+        for op, expected in constraint.items():
+            if op == '$exists':
+                if (key in row) != expected:
+                    return False
+            elif op == '$in':
+                if value not in [comparable(e) for e in expected]:
+                    return False
+            elif op == '$nin':
+                if value in [comparable(e) for e in expected]:
+                    return False
+            elif op == '$ne':
+                if value == comparable(expected):
+                    return False
+            elif key not in row:
+                return False
+            elif op == '$gt' and not value > comparable(expected):
+                return False
+            elif op == '$gte' and not value >= comparable(expected):
+                return False
+            elif op == '$lt' and not value < comparable(expected):
+                return False
+            elif op == '$lte' and not value <= comparable(expected):
+                return False
+
+    return True
+
+
+class FakeParseServer(object):
+    """
+    In-memory stand-in for the parse rest api, used with LocalTransport so that tests do not need
+    network access. Every handled request is appended to ``log``. With ``etags`` the responses to
+    GET requests carry an ETag and If-None-Match is honoured.
+    """
+
+    def __init__(self, server_url='https://api.parse.com/1/', etags=False):
+        self.path = urlparse(server_url).path
+        self.classes = {}
+        self.schemas = {}
+        self.log = []
+        self.etags = etags
+
+    def __call__(self, method, url, data, headers):
+        parsed = urlparse(url)
+        path = parsed.path[len(self.path):].strip('/').split('/')
+        params = dict(parse_qsl(parsed.query))
+        body = json.loads(data) if data else None
+
+        self.log.append((method, parsed.path, params, body))
+
+        if path[0] == 'schemas' and not headers.get('X-Parse-Master-Key'):
+            return 403, {'code': 119, 'error': 'unauthorized: master key is required'}
+
+        response = self.route(method, path, params, body, headers)
+
+        if self.etags and method == 'GET' and response[0] == 200:
+            etag = '"%s"' % hashlib.md5(json.dumps(response[1], sort_keys=True).encode()).hexdigest()
+
+            if headers.get('If-None-Match') == etag:
+                return 304, None, {'ETag': etag}
+
+            return response[0], response[1], {'ETag': etag}
+
+        return response
+
+    def route(self, method, path, params, body, headers=None):
+        if path[0] == 'batch' and method == 'POST':
+            return self.batch(body)
+
+        if path[0] == 'login' and method == 'GET':
+            return self.login(params)
+
+        if path[0] == 'users':
+            return self.users(method, path, body, headers or {})
+
+        if path[0] == 'schemas' and method == 'GET':
+            fields = dict((k, {'type': v}) for k, v in self.schemas.get(path[1], {}).items())
+            return 200, {'className': path[1], 'fields': fields}
+
+        if path[0] == 'classes' and len(path) == 2:
+            if method == 'POST':
+                return self.create(path[1], body)
+            return self.find(path[1], params)
+
+        if path[0] == 'classes' and len(path) == 3:
+            if method == 'GET':
+                return self.get(path[1], path[2], params)
+            if method == 'PUT':
+                return self.update(path[1], path[2], body)
+            if method == 'DELETE':
+                return self.delete(path[1], path[2])
+
+        return 404, {'code': 119, 'error': 'unsupported route %s' % '/'.join(path)}
+
+    def batch(self, body):
+        if len(body['requests']) > 50:
+            return 400, {'code': 107, 'error': 'too many operations in batch'}
+
+        results = []
+        for operation in body['requests']:
+            path = operation['path'][len(self.path):].strip('/').split('/')
+            status, response = self.route(operation['method'], path, {}, operation.get('body'))[:2]
+            results.append({'success': response} if status < 400 else {'error': response})
+
+        return 200, results
+
+    def login(self, params):
+        for row in self.classes.get('_User', {}).values():
+            if row['username'] == params.get('username') and \
+                    row['password'] == params.get('password'):
+                return 200, self.user(row)
+
+        return 404, {'code': 101, 'error': 'invalid login parameters'}
+
+    def users(self, method, path, body, headers):
+        if method == 'POST' and len(path) == 1:
+            status, response = self.create('_User', dict(body, sessionToken=uuid.uuid4().hex))
+            response['sessionToken'] = self.classes['_User'][response['objectId']]['sessionToken']
+            return status, response
+
+        token = headers.get('X-Parse-Session-Token')
+        rows = [row for row in self.classes.get('_User', {}).values()
+                if token is not None and row['sessionToken'] == token]
+
+        if len(rows) == 0 or path[1] not in ['me', rows[0]['objectId']]:
+            return 400, {'code': 209, 'error': 'invalid session token'}
+
+        if method == 'GET':
+            return 200, self.user(rows[0])
+        if method == 'PUT':
+            return self.update('_User', rows[0]['objectId'], body)
+        if method == 'DELETE':
+            return self.delete('_User', rows[0]['objectId'])
+
+        return 404, {'code': 119, 'error': 'unsupported route %s' % '/'.join(path)}
+
+    @staticmethod
+    def user(row):
+        return dict((k, v) for k, v in row.items() if k != 'password')
+
+    def create(self, className, body):
+        row = dict(body or {})
+        row['objectId'] = uuid.uuid4().hex[:10]
+        row['createdAt'] = row['updatedAt'] = now()
+        self.classes.setdefault(className, {})[row['objectId']] = row
+        return 201, {'objectId': row['objectId'], 'createdAt': row['createdAt']}
+
+    def get(self, className, objectId, params=None):
+        row = self.classes.get(className, {}).get(objectId)
+        if row is None:
+            return 404, {'code': 101, 'error': 'object not found for get'}
+        if params and 'include' in params:
+            row = self.include(row, params['include'])
+        return 200, row
+
+    def include(self, row, include):
+        row = copy.deepcopy(row)
+        for path in include.split(','):
+            self.embed(row, path.split('.'))
+        return row
+
+    def embed(self, row, path):
+        value = row.get(path[0])
+
+        if isinstance(value, dict) and value.get('__type') == 'Pointer':
+            target = self.classes.get(value['className'], {}).get(value['objectId'])
+            if target is None:
+                return
+            value = row[path[0]] = dict(copy.deepcopy(target), __type='Object',
+                                        className=value['className'])
+
+        if len(path) > 1 and isinstance(value, dict):
+            self.embed(value, path[1:])
+
+    def update(self, className, objectId, body):
+        row = self.classes.get(className, {}).get(objectId)
+        if row is None:
+            return 404, {'code': 101, 'error': 'object not found for update'}
+        row.update(body or {})
+        row['updatedAt'] = now()
+        return 200, {'updatedAt': row['updatedAt']}
+
+    def delete(self, className, objectId):
+        if self.classes.get(className, {}).pop(objectId, None) is None:
+            return 404, {'code': 101, 'error': 'object not found for delete'}
+        return 200, {}
+
+    def find(self, className, params):
+        where = json.loads(params.get('where', '{}'))
+        rows = [row for row in self.classes.get(className, {}).values() if matches(row, where)]
+
+        for key in reversed(params.get('order', 'createdAt').split(',')):
+            name = key.lstrip('-')
+            rows.sort(key=lambda row: (name not in row, comparable(row.get(name))),
+                      reverse=key.startswith('-'))
+
+        count = len(rows)
+        skip = int(params.get('skip', 0))
+        rows = rows[skip:skip + int(params.get('limit', 100))]
+
+        if 'keys' in params:
+            keys = params['keys'].split(',') + ['objectId', 'createdAt', 'updatedAt']
+            rows = [dict((k, v) for k, v in row.items() if k in keys) for row in rows]
+
+        if 'include' in params:
+            rows = [self.include(row, params['include']) for row in rows]
+
+        if params.get('count') == '1':
+            return 200, {'results': rows, 'count': count}
+
+        return 200, {'results': rows}
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+from pyparsecom.core import Parse
+from pyparsecom.exceptions import ParseError
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query
+from pyparsecom.retry import RetryPolicy
+from pyparsecom.throttle import ThrottledTransport, TokenBucket, AdaptiveLimiter
+from pyparsecom.transport import LocalResponse, LocalTransport
+from tests import init_local_parse
+from tests.server import FakeParseServer
+
+if sys.version_info >= (3, 6):
+    import asyncio
+    from pyparsecom.aio import (AsyncParseObject, AsyncQuery, AsyncUser, AsyncLocalTransport,
+                                AsyncTransport, ExecutorTransport, AsyncThrottledTransport,
+                                AiohttpTransport, get_transport)
+    import pyparsecom.aio
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def collect(iterator):
+    items = []
+
+    while True:
+        try:
+            items.append(run(iterator.__anext__()))
+        except StopAsyncIteration:
+            return items
+
+
+@unittest.skipIf(sys.version_info < (3, 6), 'asyncio client requires python 3.6')
+class AioTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+        Parse.Initialization.async_transport = AsyncLocalTransport(self.server)
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+    def tearDown(self):
+        asyncio.get_event_loop().close()
+
+    def test_save_fetch_delete(self):
+        class Town(AsyncParseObject):
+            pass
+
+        lyon = Town(name='Lyon')
+        run(lyon.save())
+
+        self.assertEqual(self.server.classes['Town'][lyon.objectId]['name'], 'Lyon')
+        self.assertEqual(len(lyon._dirty_keys), 0)
+
+        same = Town(objectId=lyon.objectId)
+        run(same.fetch())
+        self.assertEqual(same.name, 'Lyon')
+        self.assertTrue(same._is_loaded)
+
+        run(lyon.delete())
+        self.assertEqual(self.server.classes['Town'], {})
+        self.assertRaises(ParseError, run, same.fetch())
+
+    def test_query(self):
+        class Town(AsyncParseObject):
+            pass
+
+        errors = run(AsyncParseObject.save_all([Town(name='Town %d' % i, index=i)
+                                                for i in range(12)]))
+        self.assertEqual(errors, [None] * 12)
+
+        query = AsyncQuery('Town').greater_than('index', 2).ascending('index')
+        self.assertTrue(isinstance(query, AsyncQuery))
+
+        towns = run(query.fetch())
+        self.assertEqual([town.index for town in towns], list(range(3, 12)))
+        self.assertTrue(isinstance(towns[0], Town))
+        self.assertEqual(run(query.count()), 9)
+        self.assertEqual(run(query.fetch_with_count()).count, 9)
+        self.assertEqual(run(AsyncQuery('Town').get(towns[0].objectId)).name, 'Town 3')
+
+    def test_iterate(self):
+        class Town(AsyncParseObject):
+            pass
+
+        run(AsyncParseObject.save_all([Town(index=i) for i in range(25)]))
+        del self.server.log[:]
+
+        towns = collect(AsyncQuery('Town').iterate(page_size=10))
+        self.assertEqual(sorted(town.index for town in towns), list(range(25)))
+        self.assertEqual(len(self.server.log), 3)
+
+        towns = collect(AsyncQuery('Town').limit(15).iterate(page_size=10, prefetch=1))
+        self.assertEqual(len(towns), 15)
+
+        del self.server.log[:]
+        query = AsyncQuery('Town').equal_to('objectId', towns[0].objectId)
+        self.assertEqual(len(collect(query.iterate(page_size=1))), 1)
+        self.assertEqual(len(self.server.log), 1)
+
+        run(AsyncParseObject.delete_all(towns))
+        self.assertEqual(len(self.server.classes['Town']), 10)
+
+    def test_user(self):
+        user = run(AsyncUser.signup('jane', 'secret'))
+        self.assertTrue(isinstance(user, AsyncUser))
+
+        user = run(AsyncUser.login('jane', 'secret'))
+        self.assertEqual(user.username, 'jane')
+        self.assertFalse(hasattr(Parse.Initialization, 'session_token'))
+
+        user.nickname = 'J'
+        run(user.save())
+        self.assertEqual(self.server.classes['_User'][user.objectId]['nickname'], 'J')
+
+        self.assertEqual(run(AsyncUser.become(user.sessionToken)).objectId, user.objectId)
+        self.assertRaises(ParseError, run, AsyncUser.login('jane', 'wrong'))
+
+    def test_blocking_and_async_models(self):
+        class Village(ParseObject):
+            pass
+
+        BlockingVillage = Village
+
+        class Village(AsyncParseObject):
+            pass
+
+        class Square(AsyncParseObject):
+            pass
+
+        self.assertFalse(Village is BlockingVillage)
+        self.assertTrue(issubclass(Village, AsyncParseObject))
+
+        square = Square(name='Main')
+        run(square.save())
+        run(Village(name='Oak', square=square).save())
+
+        villages = run(AsyncQuery('Village').include('square').fetch())
+        self.assertTrue(isinstance(villages[0], Village))
+        self.assertTrue(isinstance(villages[0].square, Square))
+        self.assertTrue(isinstance(run(AsyncQuery('Village').get(villages[0].objectId)), Village))
+        self.assertTrue(isinstance(Query('Village').fetch()[0], BlockingVillage))
+
+    def test_concurrent_requests(self):
+        class Town(AsyncParseObject):
+            pass
+
+        towns = [Town(index=i) for i in range(10)]
+        run(asyncio.gather(*[town.save() for town in towns]))
+
+        self.assertEqual(len(self.server.classes['Town']), 10)
+
+    def test_bound_client(self):
+        server = FakeParseServer('https://tenant.example.com/parse/')
+        client = Parse('tenant-id', 'tenant-key', server_url='https://tenant.example.com/parse/',
+                       async_transport=AsyncLocalTransport(server))
+
+        class Town(AsyncParseObject):
+            pass
+
+        run(Town(name='Lyon').bind(client).save())
+        towns = run(AsyncQuery('Town').bind(client).fetch())
+
+        self.assertEqual(len(towns), 1)
+        self.assertTrue(towns[0]._client is client)
+        self.assertFalse('Town' in self.server.classes)
+
+    def test_retry(self):
+        failures = [(503, {'code': 1, 'error': 'internal server error'})]
+
+        def flaky(method, url, data, headers):
+            return failures.pop() if failures else self.server(method, url, data, headers)
+
+        client = Parse('application-id', 'rest-key', async_transport=AsyncLocalTransport(flaky),
+                       retry_policy=RetryPolicy(base=0, jitter=False))
+
+        self.assertEqual(run(AsyncQuery('Town').bind(client).count()), 0)
+        self.assertEqual(client.retry_policy.stats.retries, 1)
+
+    def test_throttling(self):
+        server = self.server
+        running = []
+
+        class QuotaTransport(AsyncTransport):
+            # refuses requests beyond two in flight
+            peak = 0
+
+            async def send(self, method, url, data=None, headers=None):
+                running.append(None)
+                QuotaTransport.peak = max(QuotaTransport.peak, len(running))
+                over = len(running) > 2
+                await asyncio.sleep(0.01)
+                running.pop()
+
+                if over:
+                    return LocalResponse(429, {'code': 155, 'error': 'request limit exceeded'})
+                return LocalResponse(*server(method.upper(), url, data, headers or {}))
+
+        limiter = AdaptiveLimiter(initial=4)
+        transport = AsyncThrottledTransport(QuotaTransport(), TokenBucket(1000), limiter)
+        client = Parse('application-id', 'rest-key', async_transport=transport,
+                       retry_policy=RetryPolicy(max_attempts=1))
+        query = AsyncQuery('Town').bind(client)
+
+        results = run(asyncio.gather(*[query.count() for _ in range(12)], return_exceptions=True))
+        errors = [result for result in results if isinstance(result, ParseError)]
+
+        self.assertTrue(len(errors) > 0)
+        self.assertEqual(errors[0].code, 155)
+        self.assertEqual(QuotaTransport.peak, 4)
+        self.assertTrue(limiter.limit < 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_default_transport_is_throttled(self):
+        throttled = ThrottledTransport(LocalTransport(self.server), TokenBucket(10),
+                                       AdaptiveLimiter())
+        client = Parse('application-id', 'rest-key', transport=throttled)
+        aiohttp = pyparsecom.aio.aiohttp
+
+        try:
+            # AiohttpTransport creates its session on first use, any module stands in for aiohttp
+            pyparsecom.aio.aiohttp = sys
+            transport = get_transport(client)
+        finally:
+            pyparsecom.aio.aiohttp = aiohttp
+
+        self.assertTrue(isinstance(transport, AsyncThrottledTransport))
+        self.assertTrue(isinstance(transport.transport, AiohttpTransport))
+        self.assertTrue(transport.bucket is throttled.bucket)
+        self.assertTrue(transport.limiter is throttled.limiter)
+
+    def test_default_transport(self):
+        Parse.Initialization.async_transport = None
+        transport = get_transport(Parse.Initialization)
+
+        try:
+            import aiohttp
+        except ImportError:
+            self.assertTrue(isinstance(transport, ExecutorTransport))
+
+            class Town(AsyncParseObject):
+                pass
+
+            run(Town(name='Lyon').save())
+            self.assertEqual(len(self.server.classes['Town']), 1)
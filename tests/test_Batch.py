@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from requests.exceptions import ConnectTimeout, ReadTimeout
+from pyparsecom.core import Parse
+from pyparsecom.objects import ParseObject, Batch
+from pyparsecom.exceptions import ParseError, ParseOutcomeUnknown
+from pyparsecom.retry import RetryPolicy
+from tests import init_local_parse
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+    def tearDown(self):
+        pass
+
+    def test_batch_is_chunked(self):
+        class City(ParseObject):
+            pass
+
+        batch = Batch()
+        cities = [City(name='City %d' % i) for i in range(120)]
+        for city in cities:
+            batch.save(city)
+
+        errors = batch.commit()
+
+        self.assertEqual(len(errors), 120)
+        self.assertEqual(errors, [None] * 120)
+        self.assertEqual(len(self.server.log), 3)
+        self.assertEqual(len(self.server.classes['City']), 120)
+        self.assertEqual(len(batch), 0)
+
+    def test_results_are_mapped_to_objects(self):
+        class City(ParseObject):
+            pass
+
+        ny = City(name='New York')
+        sf = City(name='San Francisco')
+        ny.save()
+        ny.name = 'New York City'
+
+        batch = Batch()
+        batch.save(ny)
+        batch.save(sf)
+        batch.commit()
+
+        self.assertNotEqual(sf.objectId, None)
+        self.assertNotEqual(sf.createdAt, None)
+        self.assertNotEqual(ny.updatedAt, None)
+        self.assertEqual(len(ny._dirty_keys), 0)
+        self.assertEqual(len(sf._dirty_keys), 0)
+        self.assertEqual(self.server.classes['City'][ny.objectId]['name'], 'New York City')
+
+    def test_per_item_errors(self):
+        class City(ParseObject):
+            pass
+
+        ny = City(name='New York')
+        ny.save()
+        missing = City(objectId='missing')
+
+        batch = Batch()
+        batch.delete(missing)
+        batch.delete(ny)
+        errors = batch.commit()
+
+        self.assertTrue(isinstance(errors[0], ParseError))
+        self.assertEqual(errors[0].code, 101)
+        self.assertEqual(errors[1], None)
+        self.assertFalse(ny.objectId in self.server.classes['City'])
+
+    def test_chunk_errors(self):
+        class City(ParseObject):
+            pass
+
+        Parse.Initialization.retry_policy = RetryPolicy(max_attempts=1)
+        apply_batch = self.server.batch
+
+        def unsent(body):
+            raise ConnectTimeout()
+
+        def lost(body):
+            apply_batch(body)
+            raise ReadTimeout()
+
+        self.server.batch = unsent
+        errors = ParseObject.save_all([City(name='Paris')])
+        self.assertTrue(isinstance(errors[0], ConnectTimeout))
+
+        # the server applied the chunk but its response was lost
+        self.server.batch = lost
+        errors = ParseObject.save_all([City(name='Rome')])
+        self.assertTrue(isinstance(errors[0], ParseOutcomeUnknown))
+        self.assertTrue(isinstance(errors[0].error, ReadTimeout))
+        self.assertEqual(len(self.server.classes['City']), 1)
+
+    def test_raw_batch_requests(self):
+        results = Parse.Initialization.batch([
+            {'route': 'classes', 'className': 'City', 'method': 'POST', 'data': {'name': 'Paris'}}
+        ])
+
+        self.assertTrue('objectId' in results[0])
+        method, path, params, body = self.server.log[0]
+        self.assertEqual(path, '/1/batch')
+        self.assertEqual(body['requests'][0]['path'], '/1/classes/City')
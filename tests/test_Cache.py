@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+from pyparsecom.cache import Cache, LRUCache
+from pyparsecom.core import Parse, SessionToken, MasterKey
+from pyparsecom.identity import IdentityMap
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query
+from pyparsecom.user import User
+from tests import init_local_parse
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+        self.clock = Clock()
+        self.cache = LRUCache(max_size=3, ttl=10, ttls={'Setting': 100, 'Person': 0},
+                              clock=self.clock)
+        Parse.Initialization.cache = self.cache
+
+        class Config(ParseObject):
+            pass
+
+        class Setting(ParseObject):
+            pass
+
+        self.config = Config(name='main', value=1)
+        self.config.save()
+        del self.server.log[:]
+
+    def tearDown(self):
+        Parse.Initialization.cache = None
+
+    def test_read_through(self):
+        first = Query('Config').equal_to('name', 'main').fetch()
+        second = Query('Config').equal_to('name', 'main').fetch()
+
+        self.assertEqual(len(self.server.log), 1)
+        self.assertEqual(second[0].value, 1)
+        self.assertFalse(first[0] is second[0])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        Query('Config').get(self.config.objectId)
+        Query('Config').get(self.config.objectId)
+        self.assertEqual(len(self.server.log), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+
+    def test_entries_are_per_credentials(self):
+        self.cache.max_size = 10
+
+        with SessionToken('alice'):
+            Query('Config').fetch()
+            Query('Config').get(self.config.objectId)
+        with SessionToken('bob'):
+            Query('Config').fetch()
+            Query('Config').get(self.config.objectId)
+        with MasterKey('master'):
+            Query('Config').fetch()
+        Query('Config').fetch()
+
+        self.assertEqual(len(self.server.log), 6)
+
+        with SessionToken('alice'):
+            Query('Config').fetch()
+        self.assertEqual(len(self.server.log), 6)
+
+    def test_key_is_normalized(self):
+        first = Query('Config').equal_to('name', 'main').greater_than('value', 0).limit(5)
+        second = Query('Config').limit(5).greater_than('value', 0).equal_to('name', 'main')
+
+        self.assertNotEqual(first.build(), second.build())
+        self.assertEqual(Cache.key('Config', first.build()), Cache.key('Config', second.build()))
+
+    def test_cached_objects_are_copies(self):
+        Query('Config').fetch()[0].value = 5
+        Query('Config').fetch().results[0]['value'] = 6
+
+        self.assertEqual(Query('Config').fetch()[0].value, 1)
+
+    def test_ttl(self):
+        Query('Config').fetch()
+        Query('Setting').fetch()
+
+        self.clock.now = 20
+        Query('Config').fetch()
+        Query('Setting').fetch()
+        self.assertEqual(len(self.server.log), 3)
+
+        # a ttl of 0 disables caching of the class
+        Query('Person').fetch()
+        Query('Person').fetch()
+        self.assertEqual(len(self.server.log), 5)
+
+    def test_lru(self):
+        for i in range(4):
+            Query('Config').limit(i + 1).fetch()
+
+        self.assertEqual(len(self.cache), 3)
+
+        Query('Config').limit(2).fetch()
+        Query('Config').limit(5).fetch()
+        Query('Config').limit(1).fetch()
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 6)
+
+    def test_invalidation_on_save_and_delete(self):
+        Query('Config').fetch()
+        Query('Setting').fetch()
+
+        self.config.value = 2
+        self.config.save()
+        self.assertEqual(Query('Config').fetch()[0].value, 2)
+
+        Query('Setting').fetch()
+        self.assertEqual(self.cache.hits, 1)
+
+        self.config.delete()
+        self.assertEqual(len(Query('Config').fetch()), 0)
+
+        ParseObject.save_all([self.config.__class__(name='other')])
+        self.assertEqual(len(Query('Config').fetch()), 1)
+
+    def test_invalidation_on_user_save(self):
+        user = User.signup('jane', 'secret')
+        Query('_User').fetch()
+
+        with IdentityMap() as identity_map:
+            user.nickname = 'J'
+            user.save()
+            self.assertTrue(user in identity_map)
+
+        self.assertEqual(Query('_User').fetch()[0].nickname, 'J')
+
+    def test_counters_are_thread_safe(self):
+        Query('Config').fetch()
+        key = list(self.cache.entries)[0]
+
+        def lookup():
+            for i in range(1000):
+                self.cache.lookup(key)
+                self.cache.lookup('missing')
+
+        threads = [threading.Thread(target=lookup) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.hits, 8000)
+        self.assertEqual(self.cache.misses, 8001)
+
+    def test_invalidation_of_included_classes(self):
+        class Person(ParseObject):
+            pass
+
+        class Team(ParseObject):
+            pass
+
+        Team(name='Core', lead=self.config).save()
+        teams = Query('Team').include('lead').fetch()
+        self.assertEqual(teams[0].lead.value, 1)
+
+        self.config.value = 3
+        self.config.save()
+        self.assertEqual(Query('Team').include('lead').fetch()[0].lead.value, 3)
+
+    def test_explicit_invalidation(self):
+        Query('Config').fetch()
+        Query('Setting').fetch()
+
+        self.cache.invalidate('Config')
+        self.assertEqual(len(self.cache), 1)
+
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
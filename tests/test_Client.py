@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+from pyparsecom.cache import LRUCache
+from pyparsecom.core import Parse, SessionToken
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query, Param
+from pyparsecom.transport import LocalTransport
+from pyparsecom.user import User
+from tests import init_local_parse
+from tests.server import FakeParseServer
+
+
+class ClientTest(unittest.TestCase):
+    def setUp(self):
+        self.default = init_local_parse()
+        self.server = FakeParseServer('https://tenant.example.com/parse/')
+        self.client = Parse('tenant-id', 'tenant-key', server_url='https://tenant.example.com/parse/',
+                            transport=LocalTransport(self.server))
+
+        class Shop(ParseObject):
+            pass
+
+        self.Shop = Shop
+
+    def tearDown(self):
+        pass
+
+    def test_bound_object(self):
+        shop = self.Shop(name='Bound').bind(self.client)
+        shop.save()
+
+        self.assertEqual(list(self.server.classes['Shop'].values())[0]['name'], 'Bound')
+        self.assertFalse('Shop' in self.default.classes)
+        self.assertEqual(self.server.log[0][1], '/parse/classes/Shop')
+        self.assertFalse('_client' in shop._dirty_keys)
+
+        shop.name = 'Renamed'
+        shop.save()
+        shop.fetch()
+        self.assertEqual(shop.name, 'Renamed')
+
+        shop.delete()
+        self.assertEqual(self.server.classes['Shop'], {})
+
+    def test_bound_query(self):
+        self.Shop(name='Default').save()
+        self.Shop(name='Tenant').bind(self.client).save()
+
+        shops = Query('Shop').bind(self.client).fetch()
+        self.assertEqual([shop.name for shop in shops], ['Tenant'])
+        self.assertTrue(shops[0]._client is self.client)
+
+        shop = Query('Shop').bind(self.client).get(shops[0].objectId)
+        self.assertTrue(shop._client is self.client)
+
+        # objects loaded from a bound query are saved to the same app
+        shops[0].name = 'Changed'
+        shops[0].save()
+        self.assertEqual(list(self.server.classes['Shop'].values())[0]['name'], 'Changed')
+        self.assertEqual([shop.name for shop in Query('Shop').fetch()], ['Default'])
+
+        # bound queries keep their client through the builder methods
+        self.assertEqual(Query('Shop').bind(self.client).equal_to('name', 'Changed').count(), 1)
+
+    def test_with_block(self):
+        with self.client:
+            self.assertTrue(Parse.current() is self.client)
+            self.Shop(name='Tenant').save()
+            self.assertEqual(len(Query('Shop').fetch()), 1)
+
+        self.assertTrue(Parse.current() is Parse.Initialization)
+        self.assertEqual(len(self.server.classes['Shop']), 1)
+        self.assertFalse('Shop' in self.default.classes)
+
+    def test_with_block_is_per_thread(self):
+        seen = []
+
+        with self.client:
+            thread = threading.Thread(target=lambda: seen.append(Parse.current()))
+            thread.start()
+            thread.join()
+
+        self.assertTrue(seen[0] is Parse.Initialization)
+
+    def test_prefetch_uses_context(self):
+        ParseObject.save_all([self.Shop(index=i).bind(self.client) for i in range(5)])
+        tokens = []
+
+        def recording(method, url, data, headers):
+            tokens.append(headers.get('X-Parse-Session-Token'))
+            return self.server(method, url, data, headers)
+
+        self.client.transport = LocalTransport(recording)
+
+        with self.client:
+            with SessionToken('token'):
+                shops = list(Query('Shop').iterate(page_size=2, prefetch=1))
+
+        self.assertEqual(sorted(shop.index for shop in shops), list(range(5)))
+        self.assertEqual(tokens, ['token'] * 3)
+
+    def test_included_and_resolved_objects_are_bound(self):
+        class Mall(ParseObject):
+            pass
+
+        mall = Mall(name='Central').bind(self.client)
+        mall.save()
+        self.Shop(name='Tenant', mall=mall).bind(self.client).save()
+
+        shop = Query('Shop', client=self.client).include('mall').fetch()[0]
+        self.assertTrue(shop.mall._client is self.client)
+
+        shop.mall.name = 'Renamed'
+        shop.mall.save()
+        self.assertEqual(self.server.classes['Mall'][mall.objectId]['name'], 'Renamed')
+        self.assertFalse('Mall' in self.default.classes)
+
+        shops = Query('Shop', client=self.client).fetch()
+        first = shops[0]
+        shops.resolve('mall')
+        self.assertTrue(first.mall._client is self.client)
+        self.assertTrue(Query('Shop', client=self.client).fetch().resolve('mall')[0].mall._client
+                        is self.client)
+
+        self.assertTrue(Query('Shop', client=self.client).include('mall')
+                        .get(shop.objectId).mall._client is self.client)
+
+    def test_batches_per_client(self):
+        shops = [self.Shop(index=i).bind(self.client if i % 2 else None) for i in range(6)]
+        self.assertEqual(ParseObject.save_all(shops), [None] * 6)
+
+        self.assertEqual(len(self.server.classes['Shop']), 3)
+        self.assertEqual(len(self.default.classes['Shop']), 3)
+
+        ParseObject.fetch_all(shops)
+        self.assertTrue(all(shop._is_loaded for shop in shops))
+
+        self.assertEqual(ParseObject.delete_all(shops), [None] * 6)
+        self.assertEqual(self.server.classes['Shop'], {})
+
+    def test_caches_per_client(self):
+        Parse.Initialization.cache = LRUCache()
+        self.client.cache = LRUCache()
+        try:
+            self.Shop(name='Default').save()
+            self.Shop(name='Tenant').bind(self.client).save()
+
+            self.assertEqual(Query('Shop').fetch()[0].name, 'Default')
+            self.assertEqual(Query('Shop').bind(self.client).fetch()[0].name, 'Tenant')
+            self.assertEqual(self.client.cache.misses, 1)
+        finally:
+            Parse.Initialization.cache = None
+
+    def test_compiled_templates_per_client(self):
+        self.Shop(name='Tenant').bind(self.client).save()
+        name = Param('name')
+
+        default = Query('Shop').equal_to('name', name).compile()
+        tenant = Query('Shop').bind(self.client).equal_to('name', name).compile()
+
+        self.assertEqual(len(default.fetch(name='Tenant')), 0)
+        self.assertEqual(len(tenant.fetch(name='Tenant')), 1)
+
+    def test_user(self):
+        User.signup('jane', 'secret', client=self.client)
+        user = User.login('jane', 'secret', client=self.client)
+
+        self.assertTrue(user._client is self.client)
+        self.assertFalse('_User' in self.default.classes)
+
+        user.nickname = 'J'
+        user.save()
+        self.assertEqual(self.server.classes['_User'][user.objectId]['nickname'], 'J')
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import datetime
+import unittest
+from pyparsecom.objects import ParseObject
+from pyparsecom.types import Date, GeoPoint, Pointer, Binary
+from pyparsecom.exceptions import ParseClassDoesNotExist, ParseError
+from pyparsecom.core import MasterKey
+from pyparsecom import codec
+from tests import init_local_parse
+
+
+class CodecTest(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_fast_date_parsing(self):
+        value = '2015-09-01T12:30:45.123Z'
+        expected = datetime.datetime.strptime(value[:-1] + 'UTC', Date.FORMAT)
+
+        self.assertEqual(Date.from_str(value), expected)
+        self.assertEqual(Date.from_str('2015-09-01T12:30:45.123456Z'),
+                         datetime.datetime(2015, 9, 1, 12, 30, 45, 123456))
+        self.assertRaises(ValueError, Date.from_str, 'not a date at all, really!')
+
+    def test_only_date_attributes_are_parsed(self):
+        class City(ParseObject):
+            pass
+
+        value = '2015-09-01T12:30:45.123Z'
+        city = ParseObject.convert_from_parse_to_native(
+            {'objectId': 'a', 'createdAt': value, 'updatedAt': value, 'name': value, 'count': 3},
+            className='City')
+
+        self.assertEqual(city.createdAt, datetime.datetime(2015, 9, 1, 12, 30, 45, 123000))
+        self.assertTrue(isinstance(city.updatedAt, datetime.datetime))
+        self.assertEqual(city.name, value)
+        self.assertEqual(city.count, 3)
+
+    def test_typed_values(self):
+        class City(ParseObject):
+            pass
+
+        row = {
+            'objectId': 'a',
+            'founded': {'__type': 'Date', 'iso': '1624-01-01T00:00:00.000Z'},
+            'location': {'__type': 'GeoPoint', 'latitude': 40.0, 'longitude': -74.0},
+            'capital': {'__type': 'Pointer', 'className': 'City', 'objectId': 'b'},
+            'flag': {'__type': 'Bytes', 'base64': 'ZmxhZw=='},
+            'sibling': {'__type': 'Object', 'className': 'City', 'objectId': 'c', 'name': 'LA'},
+            'meta': {'population': 8}
+        }
+        city = ParseObject.convert_from_parse_to_native(row, className='City')
+
+        self.assertEqual(city.founded._date, datetime.datetime(1624, 1, 1))
+        self.assertTrue(city in city.founded._parents)
+        self.assertEqual(city.location, GeoPoint(latitude=40.0, longitude=-74.0))
+        self.assertTrue(isinstance(city.capital, Pointer))
+        self.assertTrue(isinstance(city.flag, Binary))
+        self.assertEqual(city.sibling.name, 'LA')
+        self.assertTrue(city.sibling._is_loaded)
+        self.assertEqual(city.meta, {'population': 8})
+        self.assertEqual(row['location']['__type'], 'GeoPoint')
+
+    def test_schema_codec(self):
+        class Museum(ParseObject):
+            schema = {
+                'name': 'String',
+                'opened': 'Date',
+                'location': 'GeoPoint',
+                'city': 'Pointer',
+                'closed': 'Date'
+            }
+
+        row = {
+            'objectId': 'a',
+            'createdAt': '2015-09-01T12:30:45.123Z',
+            'name': 'MoMA',
+            'opened': {'__type': 'Date', 'iso': '1929-11-07T00:00:00.000Z'},
+            'location': {'__type': 'GeoPoint', 'latitude': 40.7, 'longitude': -73.9},
+            'city': {'__type': 'Pointer', 'className': 'City', 'objectId': 'ny'},
+            'closed': None,
+            'extra': {'__type': 'GeoPoint', 'latitude': 1.0, 'longitude': 2.0}
+        }
+        museum = ParseObject.convert_from_parse_to_native(row, className='Museum')
+
+        self.assertTrue(codec.get_codec(Museum) is codec.get_codec(Museum))
+        self.assertEqual(museum.opened._date, datetime.datetime(1929, 11, 7))
+        self.assertEqual(museum.location, GeoPoint(latitude=40.7, longitude=-73.9))
+        self.assertTrue(museum in museum.location._parents)
+        self.assertEqual(museum.city.objectId, 'ny')
+        self.assertEqual(museum.closed, None)
+        self.assertEqual(museum.extra, GeoPoint(latitude=1.0, longitude=2.0))
+        self.assertTrue(isinstance(museum.createdAt, datetime.datetime))
+
+        museum.opened = datetime.datetime(1929, 11, 7)
+        self.assertEqual(museum.convert_from_native_to_parse()['opened'],
+                         {'__type': 'Date', 'iso': '1929-11-07T00:00:00.000Z'})
+
+    def test_schema_change_recompiles(self):
+        class Gallery(ParseObject):
+            pass
+
+        generic = codec.get_codec(Gallery)
+        Gallery.schema = {'name': 'String'}
+        compiled = codec.get_codec(Gallery)
+
+        self.assertFalse(generic is compiled)
+        self.assertTrue('name' in compiled.decoders)
+
+    def test_load_schema(self):
+        server = init_local_parse()
+        server.schemas['Library'] = {'objectId': 'String', 'name': 'String', 'built': 'Date'}
+
+        class Library(ParseObject):
+            pass
+
+        self.assertRaises(ParseError, Library.load_schema)
+
+        with MasterKey('master'):
+            schema = Library.load_schema()
+
+        self.assertEqual(schema['built'], 'Date')
+        self.assertTrue('built' in codec.get_codec(Library).decoders)
+
+    def test_unknown_type(self):
+        class City(ParseObject):
+            pass
+
+        self.assertRaises(ParseClassDoesNotExist, codec.decode, City(), 'x', {'__type': 'Nope'})
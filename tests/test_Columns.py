@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from pyparsecom import columns
+from pyparsecom.objects import BaseParseObject, ParseObject
+from pyparsecom.query import Query
+from pyparsecom.types import GeoPoint
+from tests import init_local_parse
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class ColumnsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+        class Station(ParseObject):
+            pass
+
+        class Owner(ParseObject):
+            pass
+
+        owner = Owner(name='owner')
+        owner.save()
+
+        stations = [Station(index=i, level=i / 2.0, active=i % 2 == 0, name='Station %d' % i,
+                            location=GeoPoint(latitude=float(i), longitude=-float(i)),
+                            owner=owner)
+                    for i in range(10)]
+        stations.append(Station(name='Empty'))
+        ParseObject.save_all(stations)
+
+        self.owner = owner
+        del self.server.log[:]
+
+    def tearDown(self):
+        pass
+
+    def test_to_columns(self):
+        results = Query('Station').exists('index').ascending('index').fetch()
+        data = results.to_columns(['index', 'level', 'active', 'name', 'createdAt', 'owner'])
+
+        self.assertEqual(list(data.keys()),
+                         ['index', 'level', 'active', 'name', 'createdAt', 'owner'])
+        self.assertEqual(data['index'].dtype, numpy.int64)
+        self.assertEqual(list(data['index']), list(range(10)))
+        self.assertEqual(data['level'].dtype, numpy.float64)
+        self.assertEqual(data['active'].dtype, bool)
+        self.assertEqual(data['name'].dtype, object)
+        self.assertEqual(data['name'][3], 'Station 3')
+        self.assertEqual(data['createdAt'].dtype, numpy.dtype('datetime64[ms]'))
+        self.assertEqual(str(data['createdAt'][0]), results.results[0]['createdAt'][:-1])
+        self.assertEqual(list(data['owner']), [self.owner.objectId] * 10)
+
+    def test_geo_point(self):
+        data = Query('Station').exists('index').ascending('index').fetch().to_columns(['location'])
+
+        self.assertEqual(list(data.keys()), ['location.latitude', 'location.longitude'])
+        self.assertEqual(list(data['location.latitude']), [float(i) for i in range(10)])
+        self.assertEqual(list(data['location.longitude']), [-float(i) for i in range(10)])
+
+    def test_missing_values(self):
+        data = Query('Station').ascending('createdAt').fetch().to_columns(
+            ['index', 'active', 'location'])
+
+        self.assertEqual(data['index'].dtype, numpy.float64)
+        self.assertTrue(numpy.isnan(data['index'][10]))
+        self.assertEqual(data['active'].dtype, object)
+        self.assertTrue(data['active'][10] is None)
+        self.assertTrue(numpy.isnan(data['location.latitude'][10]))
+
+    def test_no_objects_created(self):
+        results = Query('Station').fetch()
+
+        original = BaseParseObject.__dict__['hydrate']
+        BaseParseObject.hydrate = classmethod(lambda cls, *args, **kwargs: self.fail('hydrated'))
+        try:
+            results.to_columns(['index', 'location', 'owner'])
+        finally:
+            BaseParseObject.hydrate = original
+
+    def test_schema(self):
+        rows = [{'count': 1, 'seen': {'__type': 'Date', 'iso': '2015-09-01T12:30:45.123Z'}}]
+        data = columns.to_columns(rows, ['count', 'seen'], {'count': 'Number', 'seen': 'Date'})
+
+        self.assertEqual(data['count'].dtype, numpy.float64)
+        self.assertEqual(data['seen'][0], numpy.datetime64('2015-09-01T12:30:45.123'))
+
+    def test_iterate_columns(self):
+        pages = list(Query('Station').iterate_columns(['index', 'name'], page_size=4))
+
+        self.assertEqual([len(page['name']) for page in pages], [4, 4, 3])
+        self.assertEqual(sorted(n for page in pages for n in page['name'])[0], 'Empty')
+
+        for method, path, params, body in self.server.log:
+            self.assertEqual(params['keys'], 'index,name')
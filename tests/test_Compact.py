@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import datetime
+import unittest
+from pyparsecom.compact import CompactParseObject
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query
+from pyparsecom.types import GeoPoint
+from tests import init_local_parse
+
+
+class CompactParseObjectTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+    def tearDown(self):
+        pass
+
+    def test_no_instance_dict(self):
+        class Reading(CompactParseObject):
+            pass
+
+        class SubReading(Reading):
+            pass
+
+        self.assertFalse(hasattr(Reading(), '__dict__'))
+        self.assertFalse(hasattr(SubReading(), '__dict__'))
+        self.assertFalse(isinstance(Reading(), ParseObject))
+        self.assertFalse(Reading._get_layout() is SubReading._get_layout())
+
+    def test_attributes(self):
+        class Reading(CompactParseObject):
+            pass
+
+        reading = Reading(value=1.5)
+        self.assertEqual(reading.value, 1.5)
+        self.assertEqual(reading.className, 'Reading')
+        self.assertEqual(reading._dirty_keys, set(['value']))
+        self.assertRaises(AttributeError, getattr, reading, 'missing')
+        self.assertFalse(hasattr(reading, 'objectId'))
+
+        del reading.value
+        self.assertFalse(hasattr(reading, 'value'))
+
+    def test_hydrate_is_lazy(self):
+        class Reading(CompactParseObject):
+            pass
+
+        row = {'objectId': 'a', 'createdAt': '2015-09-01T12:30:45.123Z', 'value': 3,
+               'location': {'__type': 'GeoPoint', 'latitude': 1.0, 'longitude': 2.0}}
+        reading = Reading.hydrate(row)
+
+        self.assertEqual(reading._dirty, None)
+        self.assertTrue(reading._is_loaded)
+        self.assertEqual(reading.createdAt, datetime.datetime(2015, 9, 1, 12, 30, 45, 123000))
+        self.assertEqual(reading.value, 3)
+
+        # reading does not link complex types, changing them still marks the object dirty
+        location = reading.location
+        self.assertEqual(location._parents, {reading: 'location'})
+        del location._parents[reading]
+        self.assertEqual(reading.location._parents, {})
+
+        location._parents[reading] = 'location'
+        reading.location.latitude = 5.0
+        self.assertEqual(reading._dirty_keys, set(['location']))
+
+    def test_save_and_query(self):
+        class Reading(CompactParseObject):
+            pass
+
+        reading = Reading(value=1, location=GeoPoint(latitude=1.0, longitude=2.0))
+        reading.save()
+
+        self.assertEqual(len(reading._dirty_keys), 0)
+        self.assertEqual(self.server.classes['Reading'][reading.objectId]['value'], 1)
+
+        reading.value = 2
+        reading.save()
+        self.assertEqual(self.server.classes['Reading'][reading.objectId]['value'], 2)
+
+        Reading(other=True).save()
+        readings = list(Query('Reading').fetch())
+
+        self.assertEqual(len(readings), 2)
+        self.assertEqual(readings[0].location, GeoPoint(latitude=1.0, longitude=2.0))
+        self.assertFalse(hasattr(readings[1], 'value'))
+        self.assertTrue(readings[1].other)
+
+    def test_pointer(self):
+        class Reading(CompactParseObject):
+            pass
+
+        class Sensor(ParseObject):
+            pass
+
+        reading = Reading(value=1)
+        sensor = Sensor(last=reading)
+        sensor.save()
+
+        self.assertEqual(self.server.classes['Sensor'][sensor.objectId]['last']['className'],
+                         'Reading')
+        self.assertEqual(reading.to_pointer().load().objectId, reading.objectId)
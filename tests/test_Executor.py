@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+from pyparsecom.core import Parse
+from pyparsecom.executor import Executor
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query
+from pyparsecom.transport import LocalTransport
+from pyparsecom.exceptions import ParseError
+from tests import init_local_parse
+from tests.server import FakeParseServer
+
+
+class ExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+        class Station(ParseObject):
+            pass
+
+        self.Station = Station
+        ParseObject.save_all([Station(name='Station %d' % i, index=i) for i in range(10)])
+        del self.server.log[:]
+
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        find = self.server.find
+
+        def slow_find(className, params):
+            with self.lock:
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+            time.sleep(0.05)
+            with self.lock:
+                self.running -= 1
+            return find(className, params)
+
+        self.server.find = slow_find
+        self.executor = Executor(max_workers=4)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def queries(self):
+        return [Query('Station').equal_to('index', i) for i in range(10)]
+
+    def test_map_keeps_order(self):
+        results = self.executor.map(self.queries())
+
+        self.assertEqual([[station.index for station in stations] for stations in results],
+                         [[i] for i in range(10)])
+        self.assertEqual(len(self.server.log), 10)
+        self.assertTrue(self.peak > 1)
+
+    def test_concurrency_limit(self):
+        self.executor.map(self.queries(), concurrency=2)
+        self.assertEqual(self.peak, 2)
+
+        self.peak = 0
+        self.executor.map(self.queries(), concurrency=20)
+        self.assertEqual(self.peak, 4)
+
+    def test_as_completed(self):
+        results = dict(self.executor.as_completed(self.queries()))
+        self.assertEqual(sorted(results.keys()), list(range(10)))
+        self.assertEqual(results[7][0].index, 7)
+
+    def test_stopping_iteration_skips_waiting_tasks(self):
+        completed = self.executor.as_completed(self.queries(), concurrency=2)
+        next(completed)
+        completed.close()
+        time.sleep(0.2)
+
+        self.assertTrue(len(self.server.log) <= 3)
+
+    def test_object_operations(self):
+        first, second = self.Station(name='First'), self.Station(name='Second')
+        count, _, _ = self.executor.map([Query('Station').count, first.save, second.save])
+
+        # the saves run alongside the count
+        self.assertTrue(10 <= count <= 12)
+        self.assertTrue(first.objectId is not None)
+        self.assertEqual(len(self.server.classes['Station']), 12)
+
+    def test_errors(self):
+        missing = self.Station(objectId='missing')
+        tasks = [Query('Station'), missing.fetch]
+
+        self.assertRaises(ParseError, self.executor.map, tasks)
+
+        stations, error = self.executor.map(tasks, return_exceptions=True)
+        self.assertEqual(len(stations), 10)
+        self.assertTrue(isinstance(error, ParseError))
+
+    def test_tasks_run_with_submitting_client(self):
+        client = Parse('tenant-id', 'tenant-key', transport=LocalTransport(FakeParseServer()))
+
+        with client:
+            self.assertEqual(self.executor.map([Parse.current, Parse.current]), [client, client])
+
+        self.assertEqual(self.executor.map([Parse.current]), [Parse.Initialization])
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import unittest
+from pyparsecom.identity import IdentityMap
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query
+from pyparsecom.user import User
+from tests import init_local_parse
+
+
+class IdentityMapTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+        class City(ParseObject):
+            pass
+
+        class Person(ParseObject):
+            pass
+
+        self.paris = City(name='Paris')
+        self.paris.save()
+        self.person = Person(name='Jean', city=self.paris)
+        self.person.save()
+        del self.server.log[:]
+
+    def tearDown(self):
+        pass
+
+    def test_get_returns_same_instance(self):
+        with IdentityMap() as identity_map:
+            first = Query('City').get(self.paris.objectId)
+            second = Query('City').get(self.paris.objectId)
+
+            self.assertTrue(first is second)
+            self.assertEqual(len(self.server.log), 1)
+            self.assertEqual(len(identity_map), 1)
+
+        # outside of the unit of work every lookup is a new instance
+        self.assertFalse(Query('City').get(self.paris.objectId) is first)
+
+    def test_query_results_and_pointers(self):
+        with IdentityMap():
+            city = Query('City').get(self.paris.objectId)
+            self.assertTrue(Query('City').fetch()[0] is city)
+
+            person = Query('Person').get(self.person.objectId)
+            self.assertTrue(person.city.load() is city)
+
+            person.city.load().fetch()
+            self.assertEqual(len(self.server.log), 3)
+
+    def test_pointer_load_then_fetch(self):
+        with IdentityMap():
+            person = Query('Person').include('city').get(self.person.objectId)
+            city = person.city
+
+            self.assertTrue(city._is_loaded)
+            self.assertTrue(Query('City').get(self.paris.objectId) is city)
+            self.assertEqual(len(self.server.log), 1)
+
+    def test_merge_keeps_local_changes(self):
+        self.server.classes['City'][self.paris.objectId]['population'] = 100
+
+        with IdentityMap():
+            city = Query('City').keys(['name']).fetch()[0]
+            self.assertFalse(city._is_loaded)
+
+            city.name = 'Lutetia'
+            same = Query('City').fetch()[0]
+
+            self.assertTrue(same is city)
+            self.assertEqual(city.name, 'Lutetia')
+            self.assertEqual(city.population, 100)
+            self.assertTrue(city._is_loaded)
+            self.assertEqual(city._dirty_keys, set(['name']))
+
+    def test_save_and_delete(self):
+        class City(ParseObject):
+            pass
+
+        with IdentityMap() as identity_map:
+            london = City(name='London')
+            london.save()
+
+            self.assertTrue(london in identity_map)
+            self.assertTrue(Query('City').equal_to('name', 'London').fetch()[0] is london)
+
+            london.delete()
+            self.assertFalse(london in identity_map)
+
+            rome = City(name='Rome')
+            ParseObject.save_all([rome])
+            self.assertTrue(rome in identity_map)
+            ParseObject.delete_all([rome])
+            self.assertFalse(rome in identity_map)
+
+    def test_parse_class_name(self):
+        user = User.signup('jane', 'secret')
+        del self.server.log[:]
+
+        with IdentityMap() as identity_map:
+            first = Query('_User').get(user.objectId)
+            second = Query('_User').get(user.objectId)
+
+            self.assertTrue(isinstance(first, User))
+            self.assertTrue(first is second)
+            self.assertTrue(first in identity_map)
+            self.assertEqual(len(self.server.log), 1)
+
+    def test_nested_and_threads(self):
+        seen = []
+
+        with IdentityMap() as outer:
+            with IdentityMap() as inner:
+                self.assertTrue(IdentityMap.current() is inner)
+
+                thread = threading.Thread(target=lambda: seen.append(IdentityMap.current()))
+                thread.start()
+                thread.join()
+
+            self.assertTrue(IdentityMap.current() is outer)
+
+        self.assertEqual(seen, [None])
+        self.assertEqual(IdentityMap.current(), None)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'contextvars requires python 3.7')
+    def test_asyncio_tasks(self):
+        import asyncio
+
+        async def unit_of_work(started, other_started):
+            with IdentityMap() as identity_map:
+                started.set()
+                await other_started.wait()
+                current = IdentityMap.current()
+            return identity_map, current, IdentityMap.current()
+
+        async def main():
+            first, second = asyncio.Event(), asyncio.Event()
+            return await asyncio.gather(unit_of_work(first, second), unit_of_work(second, first))
+
+        loop = asyncio.new_event_loop()
+        try:
+            for identity_map, current, after in loop.run_until_complete(main()):
+                self.assertTrue(current is identity_map)
+                self.assertEqual(after, None)
+        finally:
+            loop.close()
@@ -3,8 +3,9 @@
 import unittest
 from pyparsecom.objects import ParseObject, ComplexTypeMeta
 from pyparsecom.types import GeoPoint
-from pyparsecom.exceptions import ParseError
-from tests import init_parse
+from pyparsecom.query import QuerySet
+from pyparsecom.exceptions import ParseError, ParseResourceException
+from tests import init_parse, init_local_parse
 
 class ParseObjectTest(unittest.TestCase):
     def setUp(self):
@@ -169,4 +170,229 @@ class ParseObjectTest(unittest.TestCase):
         ny = City(name='New York')
         ny.save()
         ny.delete()
-        self.assertRaises(ParseError, ny.fetch)
\ No newline at end of file
+        self.assertRaises(ParseError, ny.fetch)
+
+
+class LocalParseObjectTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+    def tearDown(self):
+        pass
+
+    def test_plain_parse_object(self):
+        item = ParseObject(name='Plain')
+
+        self.assertEqual(item.name, 'Plain')
+        self.assertEqual(item._dirty_keys, set(['name']))
+        self.assertTrue(type(item) is ParseObject)
+
+    def test_save_all(self):
+        class City(ParseObject):
+            pass
+
+        cities = [City(name='City %d' % i) for i in range(60)]
+        errors = ParseObject.save_all(cities)
+
+        self.assertEqual(errors, [None] * 60)
+        self.assertEqual(len(self.server.log), 2)
+        for city in cities:
+            self.assertNotEqual(city.objectId, None)
+            self.assertEqual(len(city._dirty_keys), 0)
+
+    def test_save_all_with_failed_chunk(self):
+        class City(ParseObject):
+            pass
+
+        batch = self.server.batch
+        calls = []
+
+        def failing_batch(body):
+            calls.append(body)
+            if len(calls) == 2:
+                return 500, {'code': 1, 'error': 'internal server error'}
+            return batch(body)
+
+        self.server.batch = failing_batch
+        cities = [City(name='City %d' % i) for i in range(60)]
+        errors = ParseObject.save_all(cities)
+
+        self.assertEqual(errors[:50], [None] * 50)
+        self.assertEqual([error.code for error in errors[50:]], [1] * 10)
+        self.assertEqual(len([city for city in cities if hasattr(city, 'objectId')]), 50)
+        self.assertEqual(len(cities[-1]._dirty_keys), 1)
+
+        del self.server.batch
+        self.assertEqual(ParseObject.save_all(cities[50:]), [None] * 10)
+        self.assertEqual(len(self.server.classes['City']), 60)
+
+    def test_delete_all(self):
+        class City(ParseObject):
+            pass
+
+        cities = [City(name='City %d' % i) for i in range(3)]
+        ParseObject.save_all(cities)
+        errors = ParseObject.delete_all(cities)
+
+        self.assertEqual(errors, [None] * 3)
+        self.assertEqual(len(self.server.classes['City']), 0)
+
+    def test_fetch_all(self):
+        class City(ParseObject):
+            pass
+
+        cities = [City(name='City %d' % i) for i in range(5)]
+        ParseObject.save_all(cities)
+        for city in cities:
+            self.server.classes['City'][city.objectId]['country'] = 'Somewhere'
+
+        copies = [City(objectId=city.objectId) for city in cities]
+        del self.server.log[:]
+        result = ParseObject.fetch_all(copies)
+
+        self.assertEqual(len(self.server.log), 1)
+        self.assertTrue(result is copies)
+        for city, copy in zip(cities, copies):
+            self.assertEqual(copy.name, city.name)
+            self.assertEqual(copy.country, 'Somewhere')
+            self.assertTrue(copy._is_loaded)
+            self.assertEqual(len(copy._dirty_keys), 0)
+
+    def test_fetch_all_keeps_local_changes(self):
+        class City(ParseObject):
+            pass
+
+        city = City(name='Original', country='Nowhere')
+        city.save()
+        self.server.classes['City'][city.objectId]['country'] = 'Somewhere'
+
+        city.name = 'Local edit'
+        ParseObject.fetch_all([city])
+
+        self.assertEqual(city.name, 'Local edit')
+        self.assertEqual(city.country, 'Somewhere')
+        self.assertEqual(city._dirty_keys, set(['name']))
+
+    def test_hydrate(self):
+        class City(ParseObject):
+            pass
+
+        calls = []
+        setattr_ = ParseObject.__setattr__
+        new = ComplexTypeMeta.__new__
+
+        def counting_setattr(self, key, value):
+            calls.append(key)
+            setattr_(self, key, value)
+
+        def counting_new(mcs, *args):
+            calls.append(args[0])
+            return new(mcs, *args)
+
+        ParseObject.__setattr__ = counting_setattr
+        ComplexTypeMeta.__new__ = staticmethod(counting_new)
+        try:
+            rows = [{'objectId': str(i), 'name': 'City %d' % i,
+                     'location': {'__type': 'GeoPoint', 'latitude': 1.0, 'longitude': 2.0}}
+                    for i in range(10)]
+            cities = list(QuerySet(rows, 'City'))
+        finally:
+            ParseObject.__setattr__ = setattr_
+            ComplexTypeMeta.__new__ = new
+
+        self.assertEqual(calls, [])
+        for i, city in enumerate(cities):
+            self.assertTrue(isinstance(city, City))
+            self.assertEqual(city.className, 'City')
+            self.assertEqual(city.name, 'City %d' % i)
+            self.assertTrue(city._is_loaded)
+            self.assertEqual(len(city._dirty_keys), 0)
+            self.assertTrue(city in city.location._parents)
+
+        # dirty tracking works as usual once hydrated
+        cities[0].name = 'Paris'
+        cities[0].location.latitude = 3.0
+        self.assertEqual(cities[0]._dirty_keys, set(['name', 'location']))
+
+    def test_fetch_all_requires_object_id(self):
+        class City(ParseObject):
+            pass
+
+        self.assertRaises(ParseResourceException, ParseObject.fetch_all, [City(name='Paris')])
+
+    def test_refresh_by_updated_at(self):
+        class City(ParseObject):
+            pass
+
+        paris = City(name='Paris')
+        paris.save()
+        paris.fetch()
+        del self.server.log[:]
+
+        self.assertFalse(paris.refresh())
+
+        method, path, params, body = self.server.log[0]
+        self.assertEqual(path, '/1/classes/City')
+        self.assertTrue('updatedAt' in params['where'])
+
+        row = self.server.classes['City'][paris.objectId]
+        row.update(name='Lutetia', updatedAt='2099-01-01T00:00:00.000Z')
+
+        self.assertTrue(paris.refresh())
+        self.assertEqual(paris.name, 'Lutetia')
+        self.assertFalse(paris.refresh())
+
+    def test_refresh_not_loaded(self):
+        class City(ParseObject):
+            pass
+
+        paris = City(name='Paris')
+        paris.save()
+
+        self.assertTrue(paris.refresh())
+        self.assertTrue(paris._is_loaded)
+        self.assertEqual(self.server.log[-1][1], '/1/classes/City/' + paris.objectId)
+
+    def test_refresh_with_etag(self):
+        self.server.etags = True
+
+        class City(ParseObject):
+            pass
+
+        paris = City(name='Paris')
+        paris.save()
+        paris.fetch()
+        self.assertTrue(paris._etag.startswith('"'))
+        self.assertEqual(len(paris._dirty_keys), 0)
+
+        self.assertFalse(paris.refresh())
+        self.assertEqual(self.server.log[-1][1], '/1/classes/City/' + paris.objectId)
+
+        row = self.server.classes['City'][paris.objectId]
+        row.update(name='Lutetia', updatedAt='2099-01-01T00:00:00.000Z')
+        self.assertTrue(paris.refresh())
+        self.assertEqual(paris.name, 'Lutetia')
+
+        # the response differs but updatedAt does not, so the payload is not decoded again
+        row['name'] = 'Paname'
+        self.assertFalse(paris.refresh())
+        self.assertEqual(paris.name, 'Lutetia')
+
+    def test_refresh_all(self):
+        class City(ParseObject):
+            pass
+
+        cities = [City(name='City %d' % i) for i in range(5)]
+        ParseObject.save_all(cities)
+        ParseObject.fetch_all(cities[:4])
+        del self.server.log[:]
+
+        self.server.classes['City'][cities[1].objectId].update(
+            name='Changed', updatedAt='2099-01-01T00:00:00.000Z')
+
+        changed = ParseObject.refresh_all(cities)
+
+        self.assertEqual(set(changed), set([cities[1], cities[4]]))
+        self.assertEqual(cities[1].name, 'Changed')
+        self.assertTrue(cities[4]._is_loaded)
+        self.assertEqual(len(self.server.log), 2)
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import time
 import unittest
-from pyparsecom.query import Query
+from pyparsecom.query import Query, Param, QueryTemplate
 from pyparsecom.objects import ParseObject
-from tests import init_parse
+from pyparsecom.user import User
+from pyparsecom.exceptions import ParseResourceException, ParseError
+from tests import init_parse, init_local_parse
 
 
 class QueryTest(unittest.TestCase):
@@ -137,3 +140,296 @@ class QueryTest(unittest.TestCase):
         self.assertEqual(2, len(cities))
 
 
+class LocalQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+        class City(ParseObject):
+            pass
+
+        ParseObject.save_all([City(name='City %d' % i, index=i) for i in range(25)])
+        del self.server.log[:]
+
+    def tearDown(self):
+        pass
+
+    def test_iterate_all(self):
+        cities = list(Query('City').iterate(page_size=10))
+
+        self.assertEqual(len(cities), 25)
+        self.assertEqual(len(set(city.objectId for city in cities)), 25)
+        self.assertEqual(len(self.server.log), 3)
+        for method, path, params, body in self.server.log:
+            self.assertFalse('skip' in params)
+
+    def test_iterate_by_created_at(self):
+        cities = list(Query('City').iterate(page_size=4, cursor='createdAt'))
+        self.assertEqual(len(cities), 25)
+        self.assertEqual(len(set(city.objectId for city in cities)), 25)
+
+    def test_iterate_with_where_and_limit(self):
+        query = Query('City').greater_than_or_equal('index', 5)
+        self.assertEqual(len(list(query.iterate(page_size=7))), 20)
+        self.assertEqual(len(list(query.limit(12).iterate(page_size=5))), 12)
+
+    def test_iterate_with_equal_cursor(self):
+        objectId = Query('City').fetch()[0].objectId
+        del self.server.log[:]
+
+        cities = list(Query('City').equal_to('objectId', objectId).iterate(page_size=1))
+
+        self.assertEqual([city.objectId for city in cities], [objectId])
+        self.assertEqual(len(self.server.log), 1)
+
+    def test_iterate_is_lazy(self):
+        cities = Query('City').iterate(page_size=10)
+        next(cities)
+        self.assertEqual(len(self.server.log), 1)
+
+    def test_iterate_with_prefetch(self):
+        cities = list(Query('City').iterate(page_size=4, prefetch=2))
+        self.assertEqual(len(cities), 25)
+        self.assertEqual(len(set(city.objectId for city in cities)), 25)
+
+    def test_prefetch_is_bounded(self):
+        cities = Query('City').iterate(page_size=2, prefetch=1)
+        next(cities)
+        time.sleep(0.3)
+
+        # the page being consumed, one buffered page and one held by the background thread
+        self.assertEqual(len(self.server.log), 3)
+        cities.close()
+
+    def test_prefetch_raises_errors(self):
+        self.server.find = lambda className, params: (400, {'code': 102, 'error': 'bad query'})
+        self.assertRaises(ParseError, list, Query('City').iterate(prefetch=1))
+
+    def test_count(self):
+        count = Query('City').greater_than_or_equal('index', 5).skip(3).count()
+
+        self.assertEqual(count, 20)
+        method, path, params, body = self.server.log[-1]
+        self.assertEqual(params['count'], '1')
+        self.assertEqual(params['limit'], '0')
+        self.assertFalse('skip' in params)
+
+    def test_fetch_with_count(self):
+        cities = Query('City').limit(10).fetch_with_count()
+
+        self.assertEqual(len(cities), 10)
+        self.assertEqual(cities.count, 25)
+        self.assertEqual(len(self.server.log), 1)
+
+    def create_people(self):
+        class Country(ParseObject):
+            pass
+
+        class City(ParseObject):
+            pass
+
+        class Person(ParseObject):
+            pass
+
+        usa = Country(name='United States')
+        ny = City(name='New York', country=usa)
+        Person(name='Alice', city=ny).save()
+        Person(name='Bob', city=ny).save()
+        del self.server.log[:]
+
+    def test_include(self):
+        self.create_people()
+        people = Query('Person').include('city').fetch()
+
+        self.assertEqual(len(self.server.log), 1)
+        self.assertEqual(self.server.log[0][2]['include'], 'city')
+        for person in people:
+            self.assertEqual(person.city.__class__.__name__, 'City')
+            self.assertTrue(person.city._is_loaded)
+            self.assertEqual(person.city.name, 'New York')
+            self.assertEqual(person.city.country.__class__.__name__, 'Pointer')
+
+    def test_include_nested(self):
+        self.create_people()
+        people = Query('Person').include('city.country').fetch()
+
+        self.assertEqual(len(self.server.log), 1)
+        for person in people:
+            self.assertEqual(person.city.name, 'New York')
+            self.assertEqual(person.city.country.name, 'United States')
+            self.assertEqual(len(person.city._dirty_keys), 0)
+
+    def test_include_user(self):
+        class Post(ParseObject):
+            pass
+
+        owner = User.signup('jane', 'secret')
+        Post(title='Hello', owner=owner).save()
+        post = Query('Post').include('owner').fetch()[0]
+
+        self.assertTrue(isinstance(post.owner, User))
+        self.assertEqual(post.owner.username, 'jane')
+        self.assertEqual(post.owner.objectId, owner.objectId)
+
+    def test_get_with_include(self):
+        self.create_people()
+        objectId = list(self.server.classes['Person'].keys())[0]
+        person = Query('Person').include('city').get(objectId)
+
+        self.assertEqual(person.city.name, 'New York')
+
+    def test_resolve(self):
+        class City(ParseObject):
+            pass
+
+        class Person(ParseObject):
+            pass
+
+        cities = [City(name='City %d' % i) for i in range(3)]
+        ParseObject.save_all(cities)
+        ParseObject.save_all([Person(index=i, city=cities[i % 3]) for i in range(30)])
+        del self.server.log[:]
+
+        people = Query('Person').fetch().resolve('city')
+
+        self.assertEqual(len(self.server.log), 2)
+        for person in people:
+            self.assertEqual(person.city.name, 'City %d' % (person.index % 3))
+            self.assertTrue(person.city._is_loaded)
+
+        # decoding does not consume the resolved rows
+        self.assertEqual(len([person.city.name for person in people]), 30)
+
+    def test_resolve_user(self):
+        class Post(ParseObject):
+            pass
+
+        owner = User.signup('john', 'secret')
+        ParseObject.save_all([Post(index=i, owner=owner) for i in range(3)])
+        posts = Query('Post').fetch().resolve('owner')
+
+        for post in posts:
+            self.assertTrue(isinstance(post.owner, User))
+            self.assertEqual(post.owner.username, 'john')
+
+    def test_resolve_updates_accessed_objects(self):
+        class City(ParseObject):
+            pass
+
+        class Person(ParseObject):
+            pass
+
+        city = City(name='Paris')
+        city.save()
+        ParseObject.save_all([Person(index=i, city=city) for i in range(3)])
+
+        people = Query('Person').ascending('index').fetch()
+        first = people[0]
+        people[1].city = None
+        people.resolve('city')
+
+        self.assertTrue(first.city._is_loaded)
+        self.assertEqual(first.city.name, 'Paris')
+        self.assertEqual(people[1].city, None)
+        self.assertEqual(people[2].city.name, 'Paris')
+
+    def test_query_set_is_lazy(self):
+        class City(ParseObject):
+            pass
+
+        calls = []
+        hydrate = City.hydrate
+
+        def counting_hydrate(response, is_loaded=True):
+            calls.append(response['index'])
+            return hydrate(response, is_loaded=is_loaded)
+
+        City.hydrate = staticmethod(counting_hydrate)
+        try:
+            cities = Query('City').ascending('index').fetch()
+            self.assertEqual(calls, [])
+
+            page = cities[5:10]
+            self.assertEqual(len(page), 5)
+            self.assertEqual(calls, [])
+
+            self.assertEqual(page[0].index, 5)
+            self.assertEqual(page[-1].index, 9)
+            self.assertEqual(page[1:3][1].index, 7)
+            self.assertEqual(calls, [5, 9, 7])
+
+            self.assertEqual([city.index for city in cities[::10]], [0, 10, 20])
+            self.assertEqual(calls, [5, 9, 7, 0, 10, 20])
+        finally:
+            del City.hydrate
+
+    def test_query_set_caches_objects(self):
+        cities = Query('City').ascending('index').fetch()
+        first = list(cities)
+
+        self.assertTrue(cities[0] is first[0])
+        self.assertTrue(cities[3:][0] is first[3])
+        self.assertTrue(list(cities)[-1] is first[-1])
+
+        first[0].name = 'Changed'
+        self.assertEqual(cities[0].name, 'Changed')
+
+    def test_builder_is_immutable(self):
+        base = Query('City').equal_to('name', 'New York').greater_than('index', 1)
+        first = base.less_than('index', 5).ascending('index')
+        second = base.less_than('index', 9).limit(1)
+
+        self.assertEqual(base.params['where'], {'name': 'New York', 'index': {'$gt': 1}})
+        self.assertEqual(base.params['order'], [])
+        self.assertEqual(first.params['where']['index'], {'$gt': 1, '$lt': 5})
+        self.assertEqual(first.params['order'], ['index'])
+        self.assertEqual(second.params['where']['index'], {'$gt': 1, '$lt': 9})
+        self.assertFalse('limit' in first.params)
+        self.assertRaises(Exception, base.equal_to, 'index', 3)
+
+    def test_builder_does_not_copy_values(self):
+        class City(ParseObject):
+            pass
+
+        ny = City(objectId='ny')
+        query = Query('City').equal_to('sibling', ny).not_equal_to('name', 'x')
+        value = query.params['where']['sibling']
+
+        self.assertTrue(query.limit(1).params['where']['sibling'] is value)
+
+    def test_first(self):
+        query = Query('City').first()
+        self.assertEqual(query.params['limit'], 1)
+        self.assertEqual(query.params['skip'], 0)
+        self.assertEqual(len(query.fetch()), 1)
+
+    def test_compiled_template(self):
+        query = Query('City').greater_than_or_equal('index', Param('low'))
+        template = query.less_than('index', Param('high')).ascending('index').limit(3).compile()
+
+        self.assertEqual(template.names, ('low', 'high'))
+        self.assertEqual(template.bind(low=5, high=8),
+                         Query('City').greater_than_or_equal('index', 5).less_than('index', 8)
+                         .ascending('index').limit(3).build())
+        self.assertEqual([city.index for city in template.fetch(low=5, high=20)], [5, 6, 7])
+        self.assertEqual(template.count(low=5, high=20), 15)
+        self.assertRaises(ParseResourceException, template.bind, low=5)
+
+    def test_compiled_template_is_cached(self):
+        template = Query('City').equal_to('name', Param('name')).compile()
+        same = Query('City').equal_to('name', Param('name')).compile()
+        other = Query('City').equal_to('country', Param('name')).compile()
+
+        self.assertTrue(template is same)
+        self.assertEqual(hash(template), hash(same))
+        self.assertNotEqual(template, other)
+        self.assertEqual(len({template: 1, same: 2, other: 3}), 2)
+        self.assertTrue(isinstance(template, QueryTemplate))
+
+        renamed = Query('City').equal_to('name', Param('other')).compile()
+        self.assertNotEqual(template, renamed)
+        self.assertNotEqual(hash(template), hash(renamed))
+        self.assertEqual([city.name for city in template.fetch(name='City 3')], ['City 3'])
+
+    def test_iterate_rejects_order(self):
+        query = Query('City').ascending('name')
+        self.assertRaises(ParseResourceException, list, query.iterate())
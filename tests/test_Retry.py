@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from requests.exceptions import ConnectionError, ConnectTimeout
+from pyparsecom.core import Parse
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query
+from pyparsecom.retry import RetryPolicy, RetryBudget
+from pyparsecom.transport import LocalTransport, LocalResponse
+from pyparsecom.exceptions import ParseError
+from tests.server import FakeParseServer
+
+
+class FlakyServer(FakeParseServer):
+    """
+    Answers the first requests with the given failures, then like FakeParseServer. A failure is
+    a response tuple or an exception to raise.
+    """
+
+    def __init__(self, failures):
+        super(FlakyServer, self).__init__()
+        self.failures = list(failures)
+
+    def __call__(self, method, url, data, headers):
+        if self.failures:
+            failure = self.failures.pop(0)
+            self.log.append((method, None, None, None))
+
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+
+        return super(FlakyServer, self).__call__(method, url, data, headers)
+
+
+UNAVAILABLE = (503, {'code': 1, 'error': 'internal server error'})
+THROTTLED = (429, {'code': 155, 'error': 'request limit exceeded'})
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(base=0.5, cap=3, jitter=False)
+
+    def tearDown(self):
+        pass
+
+    def test_backoff(self):
+        self.assertEqual([self.policy.backoff(attempt) for attempt in range(1, 6)],
+                         [0.5, 1, 2, 3, 3])
+
+        jittered = RetryPolicy(base=0.5, random=lambda: 0.25)
+        self.assertEqual(jittered.backoff(3), 0.5)
+
+    def test_idempotent_methods(self):
+        reason = self.policy.reason
+        self.assertEqual(reason('GET', LocalResponse(*UNAVAILABLE)), 'status 503')
+        self.assertEqual(reason('PUT', LocalResponse(400, {'code': 124, 'error': 'timeout'})),
+                         'code 124')
+        self.assertEqual(reason('DELETE', error=ValueError()), 'ValueError')
+        self.assertEqual(reason('GET', LocalResponse(404, {'code': 101, 'error': 'missing'})),
+                         None)
+        self.assertEqual(reason('GET', LocalResponse(200, {})), None)
+
+    def test_non_idempotent_methods(self):
+        reason = self.policy.reason
+        self.assertEqual(reason('POST', LocalResponse(*UNAVAILABLE)), None)
+        self.assertEqual(reason('POST', error=ConnectionError('reset by peer')), None)
+        self.assertEqual(reason('POST', LocalResponse(*THROTTLED)), 'status 429')
+        self.assertEqual(reason('POST', LocalResponse(400, THROTTLED[1])), 'code 155')
+        self.assertEqual(reason('POST', error=ConnectTimeout()), 'ConnectTimeout')
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, capacity=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+
+class RetryTest(unittest.TestCase):
+    def setUp(self):
+        self.waits = []
+
+        class Kettle(ParseObject):
+            pass
+
+        self.Kettle = Kettle
+
+    def tearDown(self):
+        pass
+
+    def client(self, failures, **options):
+        self.server = FlakyServer(failures)
+        self.policy = RetryPolicy(jitter=False, sleep=self.waits.append, **options)
+        return Parse('application-id', 'rest-key', transport=LocalTransport(self.server),
+                     retry_policy=self.policy)
+
+    def test_retries_with_backoff(self):
+        client = self.client([UNAVAILABLE, ConnectionError(), UNAVAILABLE])
+
+        self.assertEqual(Query('Kettle', client=client).count(), 0)
+        self.assertEqual(self.waits, [0.1, 0.2, 0.4])
+        self.assertEqual(self.policy.stats.as_dict(), {
+            'requests': 1, 'retries': 3, 'recovered': 1, 'exhausted': 0, 'over_budget': 0,
+            'reasons': {'status 503': 2, 'ConnectionError': 1}})
+
+    def test_gives_up_after_max_attempts(self):
+        client = self.client([UNAVAILABLE] * 5, max_attempts=3)
+
+        self.assertRaises(ParseError, Query('Kettle', client=client).count)
+        self.assertEqual(len(self.server.log), 3)
+        self.assertEqual(self.policy.stats.exhausted, 1)
+
+    def test_post_is_not_replayed(self):
+        client = self.client([UNAVAILABLE])
+        kettle = self.Kettle(name='Blue').bind(client)
+
+        self.assertRaises(ParseError, kettle.save)
+        self.assertEqual(len(self.server.log), 1)
+        self.assertEqual(self.waits, [])
+
+    def test_throttled_post_is_retried(self):
+        client = self.client([THROTTLED + ({'Retry-After': '2'},)])
+        kettle = self.Kettle(name='Blue').bind(client)
+        kettle.save()
+
+        self.assertEqual(len(self.server.classes['Kettle']), 1)
+        self.assertEqual(self.waits, [2])
+
+    def test_budget_limits_retries(self):
+        client = self.client([UNAVAILABLE] * 4, budget=RetryBudget(ratio=0, capacity=2))
+
+        self.assertRaises(ParseError, Query('Kettle', client=client).count)
+        self.assertEqual(len(self.server.log), 3)
+        self.assertEqual(self.policy.stats.over_budget, 1)
+
+    def test_errors_are_not_retried(self):
+        client = self.client([])
+        self.assertRaises(ParseError, self.Kettle(objectId='missing').bind(client).fetch)
+        self.assertEqual(self.waits, [])
+        self.assertEqual(self.policy.stats.retries, 0)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import multiprocessing
+import threading
+import time
+import unittest
+from pyparsecom.core import Parse
+from pyparsecom.objects import ParseObject
+from pyparsecom.query import Query
+from pyparsecom.retry import RetryPolicy
+from pyparsecom.throttle import TokenBucket, AdaptiveLimiter, ThrottledTransport
+from pyparsecom.transport import LocalTransport
+from pyparsecom.exceptions import ParseError
+from tests.server import FakeParseServer
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def take(bucket, tokens):
+    for _ in range(tokens):
+        bucket.acquire()
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+
+    def tearDown(self):
+        pass
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(10, capacity=5, clock=self.clock, sleep=self.clock.sleep)
+
+        take(bucket, 5)
+        self.assertEqual(self.clock.now, 1000.0)
+
+        take(bucket, 10)
+        self.assertAlmostEqual(self.clock.now, 1001.0)
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(10, capacity=5, clock=self.clock, sleep=self.clock.sleep)
+        take(bucket, 5)
+        self.clock.now += 60
+
+        self.assertEqual(bucket.tokens, 5)
+        self.assertTrue(bucket.try_acquire(5))
+        self.assertFalse(bucket.try_acquire())
+
+    def test_drain(self):
+        bucket = TokenBucket(10, clock=self.clock, sleep=self.clock.sleep)
+        bucket.drain(2)
+        bucket.acquire()
+
+        self.assertAlmostEqual(self.clock.now, 1002.1)
+
+    def test_shared_between_processes(self):
+        bucket = TokenBucket(1, capacity=10, shared=True)
+        worker = multiprocessing.Process(target=take, args=(bucket, 6))
+        worker.start()
+        worker.join()
+
+        self.assertTrue(bucket.tokens < 5)
+        self.assertFalse(bucket.try_acquire(5))
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_additive_increase(self):
+        limiter = AdaptiveLimiter(initial=2, maximum=3)
+
+        for _ in range(10):
+            limiter.release(limiter.acquire(), throttled=False)
+
+        self.assertEqual(limiter.limit, 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_burst_of_throttles_cuts_once(self):
+        limiter = AdaptiveLimiter(initial=8)
+        tickets = [limiter.acquire() for _ in range(8)]
+
+        for ticket in tickets:
+            limiter.release(ticket, throttled=True)
+
+        self.assertEqual(limiter.limit, 4)
+
+        limiter.release(limiter.acquire(), throttled=True)
+        self.assertEqual(limiter.limit, 2)
+
+        for _ in range(5):
+            limiter.release(limiter.acquire(), throttled=True)
+        self.assertEqual(limiter.limit, 1)
+
+    def test_errors_do_not_adapt(self):
+        limiter = AdaptiveLimiter(initial=4)
+        limiter.release(limiter.acquire(), throttled=None)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_acquire_waits_for_slot(self):
+        limiter = AdaptiveLimiter(initial=1)
+        ticket = limiter.acquire()
+        acquired = []
+        self.assertEqual(limiter.try_acquire(), None)
+
+        waiting = threading.Thread(target=lambda: acquired.append(limiter.acquire()))
+        waiting.start()
+        time.sleep(0.05)
+        self.assertEqual(acquired, [])
+
+        limiter.release(ticket, throttled=False)
+        waiting.join(1)
+        self.assertEqual(len(acquired), 1)
+
+
+class QuotaServer(FakeParseServer):
+    """
+    Refuses requests beyond a number in flight like an overloaded server.
+    """
+
+    def __init__(self, quota):
+        super(QuotaServer, self).__init__()
+        self.quota = quota
+        self.running = 0
+        self.refused = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, data, headers):
+        with self.lock:
+            self.running += 1
+            over = self.running > self.quota
+            self.refused += over
+
+        try:
+            if over:
+                return 429, {'code': 155, 'error': 'request limit exceeded'}, {'Retry-After': '0'}
+            time.sleep(0.01)
+            return super(QuotaServer, self).__call__(method, url, data, headers)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class ThrottledTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.server = QuotaServer(3)
+        self.limiter = AdaptiveLimiter(initial=12)
+        self.bucket = TokenBucket(1000)
+        self.client = Parse('application-id', 'rest-key', transport=ThrottledTransport(
+            LocalTransport(self.server), self.bucket, self.limiter),
+            retry_policy=RetryPolicy(max_attempts=1))
+
+        class Lamp(ParseObject):
+            pass
+
+    def tearDown(self):
+        pass
+
+    def count(self, errors):
+        try:
+            Query('Lamp', client=self.client).count()
+        except ParseError as e:
+            errors.append(e)
+
+    def run_workers(self, number):
+        errors = []
+        workers = [threading.Thread(target=self.count, args=(errors,)) for _ in range(number)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return errors
+
+    def test_backs_off_when_throttled(self):
+        errors = self.run_workers(24)
+
+        self.assertTrue(len(errors) > 0)
+        self.assertEqual(errors[0].code, 155)
+        self.assertTrue(self.limiter.limit < 12)
+
+        # bounded at the quota requests are never refused
+        refused = self.server.refused
+        self.limiter.limit = self.limiter.maximum = 3
+        self.assertEqual(self.run_workers(24), [])
+        self.assertEqual(self.server.refused, refused)
+
+    def test_throttled_response_drains_bucket(self):
+        self.server.quota = 0
+        self.assertRaises(ParseError, Query('Lamp', client=self.client).count)
+        self.assertTrue(self.bucket.tokens < 1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from pyparsecom.core import Parse
+from pyparsecom.objects import ParseObject
+from pyparsecom.transport import SessionTransport, LocalTransport
+from pyparsecom.exceptions import ParseError
+from tests import init_local_parse
+
+
+class TransportTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+    def tearDown(self):
+        pass
+
+    def test_default_transport_is_pooled_session(self):
+        parse = Parse('application-id', 'rest-key')
+        self.assertTrue(isinstance(parse.transport, SessionTransport))
+
+        adapter = parse.transport.session.get_adapter(Parse.server_url)
+        self.assertEqual(adapter._pool_maxsize, 10)
+
+    def test_session_transport_options(self):
+        transport = SessionTransport(pool_maxsize=32, connect_timeout=2, read_timeout=5)
+        adapter = transport.session.get_adapter(Parse.server_url)
+
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(transport.timeout, (2, 5))
+
+    def test_initialize_replaces_transport(self):
+        transport = LocalTransport(self.server)
+        Parse.initialize('application-id', 'rest-key', transport=transport)
+        self.assertTrue(Parse.Initialization.transport is transport)
+
+    def test_requests_go_through_local_transport(self):
+        class City(ParseObject):
+            pass
+
+        ny = City(name='New York')
+        ny.save()
+        ny.fetch()
+
+        self.assertEqual(ny.name, 'New York')
+        self.assertEqual([entry[0] for entry in self.server.log], ['POST', 'GET'])
+
+        method, path, params, body = self.server.log[0]
+        self.assertEqual(path, '/1/classes/City')
+        self.assertEqual(body, {'name': 'New York'})
+
+    def test_error_response_raises_parse_error(self):
+        class City(ParseObject):
+            pass
+
+        ny = City(objectId='missing')
+        self.assertRaises(ParseError, ny.fetch)
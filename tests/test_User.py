@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import threading
 import unittest
+from pyparsecom.core import Parse, SessionToken, MasterKey
 from pyparsecom.user import User
 from pyparsecom.exceptions import ParseError
 import uuid
-from tests import init_parse
+from tests import init_parse, init_local_parse
 
 
 class UserTest(unittest.TestCase):
@@ -53,3 +55,123 @@ class UserTest(unittest.TestCase):
         self.assertEqual(pointer_data['className'], '_User')
         self.assertEqual(pointer_data['__type'], 'Pointer')
         self.assertEqual(pointer_data['objectId'], user.objectId)
+
+
+class LocalUserTest(unittest.TestCase):
+    def setUp(self):
+        self.server = init_local_parse()
+
+    def tearDown(self):
+        pass
+
+    def headers(self):
+        return Parse.Initialization._prepare(route='classes', className='City')[3]
+
+    def test_credentials_are_scoped(self):
+        with SessionToken('token'):
+            self.assertEqual(self.headers()['X-Parse-Session-Token'], 'token')
+
+            with MasterKey('master'):
+                self.assertEqual(self.headers()['X-Parse-Master-Key'], 'master')
+                self.assertFalse('X-Parse-Session-Token' in self.headers())
+
+            self.assertEqual(self.headers()['X-Parse-Session-Token'], 'token')
+
+        self.assertFalse('X-Parse-Session-Token' in self.headers())
+        self.assertFalse(hasattr(Parse.Initialization, 'session_token'))
+
+    def test_master_key_of_instance_is_kept(self):
+        Parse.Initialization.master_key = 'configured'
+        try:
+            with MasterKey('other'):
+                self.assertEqual(self.headers()['X-Parse-Master-Key'], 'other')
+
+            self.assertEqual(self.headers()['X-Parse-Master-Key'], 'configured')
+        finally:
+            Parse.Initialization.master_key = None
+
+    def test_credentials_per_thread(self):
+        errors = []
+        barrier = threading.Event()
+
+        def work(i):
+            try:
+                with SessionToken('token %d' % i):
+                    barrier.wait()
+                    for _ in range(100):
+                        if self.headers()['X-Parse-Session-Token'] != 'token %d' % i:
+                            errors.append(i)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        barrier.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+    def test_shared_instance_exited_out_of_order(self):
+        master_key = MasterKey('shared')
+        a_entered, b_entered, a_exited = threading.Event(), threading.Event(), threading.Event()
+        errors = []
+        seen = []
+
+        def first():
+            try:
+                with master_key:
+                    a_entered.set()
+                    b_entered.wait(5)
+                seen.append(self.headers().get('X-Parse-Master-Key'))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                a_exited.set()
+
+        def second():
+            try:
+                a_entered.wait(5)
+                with master_key:
+                    b_entered.set()
+                    a_exited.wait(5)
+                    seen.append(self.headers().get('X-Parse-Master-Key'))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(seen, key=str), [None, 'shared'])
+
+    def test_users_in_parallel(self):
+        users = [User.signup('user %d' % i, 'password') for i in range(8)]
+        errors = []
+
+        def work(user):
+            try:
+                for i in range(10):
+                    user.visits = i
+                    user.save()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for user in users:
+            self.assertEqual(self.server.classes['_User'][user.objectId]['visits'], 9)
+
+        self.assertEqual(User.become(users[0].sessionToken).username, 'user 0')
+
+        users[1].delete()
+        self.assertFalse(users[1].objectId in self.server.classes['_User'])